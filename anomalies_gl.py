@@ -0,0 +1,144 @@
+import sys
+import pandas as pd
+from outils_gl import bornes_periodes, periodes_soldes
+
+# === PARAMÈTRES ===
+FICHIER_ANOMALIES = "Anomalies_GL.xlsx"
+
+COLONNES_REVUE = [
+    'Anomalie', 'Groupe', 'Date', 'Libellé', 'Compte', 'Nom du Compte', 'Document',
+    'Débit', 'Crédit', 'Devise', 'Origine', 'Origine_écriture', 'Feuille', 'Période'
+]
+
+# Clés composites des doublons
+CLE_DOUBLON_EXACT = ['Compte', 'Document (clé)', 'Date', 'Débit', 'Crédit', 'Libellé', 'Origine']
+CLE_DOUBLON_PROBABLE = ['Compte', 'Date', 'Montant signé', 'Libellé normalisé']
+
+# === FONCTIONS ===
+
+def hacher_cle(df, colonnes):
+    """Empreinte 64 bits de la clé composite de chaque ligne (vectorisée)."""
+    return pd.util.hash_pandas_object(df[colonnes], index=False)
+
+def normaliser_libelle(libelles):
+    """Libellé en minuscules, sans ponctuation ni espaces multiples (comparaison des doublons probables)."""
+    return (
+        libelles.fillna('').astype(str).str.lower()
+        .str.replace(r'[^\w]+', ' ', regex=True)
+        .str.strip()
+    )
+
+def detecter_anomalies(gl_consolide, periodes=None):
+    """
+    Recherche dans le grand livre consolidé, en temps linéaire :
+    - les doublons exacts (même compte, document, date, montants, libellé et origine),
+    - les doublons probables (même compte, date, montant et libellé normalisé, autre document ou origine),
+    - les écritures hors de la période 'Solde' de leur feuille,
+    - les écritures d'origine inconnue ('Inconnu').
+    Retourne une ligne par écriture et par anomalie.
+    """
+    # Les reports de solde initiaux ne sont pas des écritures à contrôler
+    gl = gl_consolide[gl_consolide['Origine'] != 'Report'].copy()
+    gl['Document (clé)'] = gl['Document'].astype(str)
+    gl['Montant signé'] = (gl['Débit'] - gl['Crédit']).round(2)
+    gl['Libellé normalisé'] = normaliser_libelle(gl['Libellé'])
+
+    if periodes is not None and len(periodes):
+        bornes = bornes_periodes(periodes)
+        debut = gl['Feuille'].map(bornes['Début'])
+        fin = gl['Feuille'].map(bornes['Fin'])
+        gl['Période'] = gl['Feuille'].map(periodes)
+        hors_periode = gl['Date'].notna() & debut.notna() & ((gl['Date'] < debut) | (gl['Date'] > fin))
+    else:
+        gl['Période'] = None
+        hors_periode = pd.Series(False, index=gl.index)
+
+    cle_exacte = hacher_cle(gl, CLE_DOUBLON_EXACT)
+    doublon_exact = cle_exacte.duplicated(keep=False)
+
+    cle_probable = hacher_cle(gl, CLE_DOUBLON_PROBABLE)
+    doublon_probable = cle_probable.duplicated(keep=False)
+    # Un groupe composé uniquement de copies exactes relève des doublons exacts
+    variantes = cle_exacte[doublon_probable].groupby(cle_probable[doublon_probable]).nunique()
+    doublon_probable &= cle_probable.map(variantes).fillna(0) > 1
+
+    origine_inconnue = gl['Origine_écriture'] == 'Inconnu'
+
+    controles = [
+        ('Doublon exact', doublon_exact, cle_exacte),
+        ('Doublon probable', doublon_probable, cle_probable),
+        ('Hors période', hors_periode, None),
+        ('Origine inconnue', origine_inconnue, None),
+    ]
+
+    revues = []
+    for anomalie, masque, cles in controles:
+        if not masque.any():
+            continue
+        revue = gl.loc[masque].copy()
+        revue['Anomalie'] = anomalie
+        # Identifiant de groupe lisible : rang de l'empreinte parmi les groupes
+        revue['Groupe'] = pd.factorize(cles[masque])[0] + 1 if cles is not None else None
+        revues.append(revue)
+
+    if not revues:
+        return pd.DataFrame(columns=COLONNES_REVUE)
+
+    revue = pd.concat(revues, ignore_index=True)
+    return revue.sort_values(['Anomalie', 'Groupe', 'Compte', 'Date'], na_position='last', kind='mergesort')[COLONNES_REVUE]
+
+def exporter_anomalies(revue, fichier_output=FICHIER_ANOMALIES):
+    """Exporte la feuille de revue des anomalies (avec un récapitulatif par type)."""
+    with pd.ExcelWriter(fichier_output, engine='xlsxwriter') as writer:
+        recap = revue.groupby('Anomalie').size().rename('Écritures').reset_index()
+        recap.to_excel(writer, sheet_name='Récapitulatif', index=False)
+        revue.to_excel(writer, sheet_name='Revue', index=False)
+
+        workbook = writer.book
+        header_format = workbook.add_format({
+            'bold': True,
+            'bg_color': '#4472C4',
+            'font_color': 'white',
+            'border': 1
+        })
+        date_format = workbook.add_format({'num_format': 'dd.mm.yyyy'})
+        currency_format = workbook.add_format({'num_format': '###0.00'})
+
+        worksheet = writer.sheets['Revue']
+        for col_num, value in enumerate(revue.columns.values):
+            worksheet.write(0, col_num, value, header_format)
+        worksheet.set_column('A:A', 18)  # Anomalie
+        worksheet.set_column('B:B', 8)  # Groupe
+        worksheet.set_column('C:C', 12, date_format)  # Date
+        worksheet.set_column('D:D', 40)  # Libellé
+        worksheet.set_column('E:G', 14)  # Compte, Nom du Compte, Document
+        worksheet.set_column('H:I', 14, currency_format)  # Débit, Crédit
+        worksheet.set_column('J:N', 16)
+        worksheet.freeze_panes(1, 0)
+        worksheet.autofilter(0, 0, len(revue), len(revue.columns) - 1)
+
+        worksheet = writer.sheets['Récapitulatif']
+        for col_num, value in enumerate(recap.columns.values):
+            worksheet.write(0, col_num, value, header_format)
+        worksheet.set_column('A:B', 20)
+
+    print(f"Revue des anomalies sauvegardée dans : {fichier_output}")
+
+# === MAIN ===
+
+def main(arguments):
+    """Usage : python anomalies_gl.py <Grand_Livre_Consolidé.xlsx> [soldes_par_feuille.xlsx]"""
+    if not arguments:
+        print(main.__doc__)
+        return
+
+    gl = pd.read_excel(arguments[0], sheet_name='Grand Livre')
+    gl['Date'] = pd.to_datetime(gl['Date'])
+    periodes = None
+    if len(arguments) > 1:
+        periodes = periodes_soldes(pd.read_excel(arguments[1], sheet_name='Soldes'))
+
+    exporter_anomalies(detecter_anomalies(gl, periodes))
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
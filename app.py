@@ -1,8 +1,13 @@
 import os
 from flask import Flask, render_template, request, redirect, url_for, send_file, jsonify
 from werkzeug.utils import secure_filename
-from extraction_gl import consolider_gl, analyser_comptes
-from extraction_gl_EF import exporter_rapports, generer_bilan, generer_compte_resultat, charger_donnees
+from gestion_jobs import creer_job, maj_job, lire_job, dernier_job, dossier_job, enregistrer_artefact, lister_artefacts, CHAMPS_ETAT
+from detail_gl import charger_index, charger_detail, lignes_detail, LIGNES_PAR_PAGE
+from archive_gl import archiver_gl
+from outils_gl import periodes_soldes
+from chaine_traitement import executer_chaine, FICHIERS_SORTIE, FICHIERS_DETAIL, FICHIERS_PROFIL
+import stockage_artefacts
+import shutil
 import pandas as pd
 from threading import Thread
 import time
@@ -12,54 +17,59 @@ app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['ALLOWED_EXTENSIONS'] = {'xlsx'}
 app.secret_key = os.urandom(24)
 
-# Global processing status
-processing_status = {
-    'current': 0,
-    'total': 0,
-    'message': '',
-    'completed': False,
-    'error': None
-}
-
 def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
 
-def background_processing(filepath):
-    global processing_status
+def job_demande():
+    """Identifiant du job demandé (paramètre job_id), ou le plus récent par défaut."""
+    return request.args.get('job_id') or dernier_job()
+
+def ranger_artefact(job_id, cle, nom, chemin):
+    """Déplace un fichier produit dans le stock d'artefacts et le rattache au job."""
+    chemin_stocke = stockage_artefacts.stocker(cle, nom, chemin, deplacer=True)
+    enregistrer_artefact(job_id, nom, chemin_stocke)
+    return chemin_stocke
+
+def background_processing(job_id, filepath, profilage=False, entite=None):
+    dossier = dossier_job(job_id)
+    cle = None
     try:
-        # Step 1: Count sheets
-        with pd.ExcelFile(filepath) as xls:
-            total_sheets = len(xls.sheet_names)
-        
-        processing_status['total'] = total_sheets
-        processing_status['message'] = 'Analyse de la structure du fichier...'
-        
-        # Step 2: Consolidate GL
-        processing_status['message'] = 'Consolidation du grand livre...'
-        gl_consolide = consolider_gl(filepath, "Grand_Livre_Consolidé.xlsx")
-        processing_status['current'] = total_sheets // 3
+        # Step 0: Reuse stored outputs for an identical ledger
+        maj_job(job_id, message='Recherche de résultats existants...')
+        cle = stockage_artefacts.cle_contenu(filepath)
+        # Entrée protégée de l'éviction par les autres workers jusqu'à la fin du job
+        stockage_artefacts.prendre_bail(cle, job_id)
+        en_cache = None if profilage else stockage_artefacts.chercher(cle, [*FICHIERS_SORTIE, *FICHIERS_DETAIL])
+        if en_cache:
+            for nom, chemin in en_cache.items():
+                enregistrer_artefact(job_id, nom, chemin)
+            if entite:
+                periodes = periodes_soldes(pd.read_excel(en_cache['soldes'], sheet_name='Soldes'))
+                gl_detail = charger_detail(en_cache['detail_gl'], en_cache['index_detail'])[0].to_pandas()
+                archiver_gl(gl_detail, entite, cle, periodes)
+            maj_job(job_id, current=1, total=1, message='Résultats récupérés du stock.', completed=True)
+            return
+        filepath = ranger_artefact(job_id, cle, 'entree', filepath)
         
-        # Step 3: Analyze accounts
-        processing_status['message'] = 'Analyse des soldes comptables...'
-        df_soldes = analyser_comptes(gl_consolide, filepath, "soldes_par_feuille.xlsx")
-        processing_status['current'] = total_sheets // 3 * 2
-        
-        # Step 4: Financial statements
-        processing_status['message'] = 'Génération des états financiers...'
-        df = charger_donnees()
-        bilan, bilan_details = generer_bilan(df)
-        resultat, resultat_details = generer_compte_resultat(df)
-        exporter_rapports(bilan, resultat, bilan_details, resultat_details)
+        # Steps 1-5: shared pipeline, each output moved into the store as soon as it is written
+        executer_chaine(
+            filepath, dossier, entite=entite, source=cle, profilage=profilage,
+            suivi=lambda message, avancement: maj_job(job_id, message=message, current=int(avancement * 100), total=100),
+            produit=lambda nom, chemin: ranger_artefact(job_id, cle, nom, chemin)
+        )
         
         # Finalize
-        processing_status['current'] = total_sheets
-        processing_status['message'] = 'Traitement terminé avec succès!'
-        processing_status['completed'] = True
+        maj_job(job_id, current=100, total=100, message='Traitement terminé avec succès!', completed=True)
         
     except Exception as e:
-        processing_status['error'] = str(e)
-        processing_status['message'] = f'Erreur: {str(e)}'
+        maj_job(job_id, error=str(e), message=f'Erreur: {str(e)}')
+    finally:
+        if cle:
+            stockage_artefacts.rendre_bail(cle, job_id)
+        # Upload and outputs now live in the artefact store
+        shutil.rmtree(os.path.join(app.config['UPLOAD_FOLDER'], job_id), ignore_errors=True)
+        shutil.rmtree(dossier, ignore_errors=True)
 
 @app.route('/')
 def index():
@@ -67,7 +77,13 @@ def index():
 
 @app.route('/progress')
 def progress():
-    return jsonify(processing_status)
+    job_id = job_demande()
+    job = lire_job(job_id) if job_id else None
+    if job is None:
+        return jsonify({'error': 'Traitement introuvable'}), 404
+    etat = {champ: job[champ] for champ in CHAMPS_ETAT}
+    etat['job_id'] = job_id
+    return jsonify(etat)
 
 @app.route('/upload', methods=['POST'])
 def upload_file():
@@ -81,44 +97,45 @@ def upload_file():
     if not allowed_file(file.filename):
         return jsonify({'error': 'Type de fichier non autorisé'}), 400
     
-    # Reset processing status
-    global processing_status
-    processing_status = {
-        'current': 0,
-        'total': 0,
-        'message': 'Initialisation...',
-        'completed': False,
-        'error': None
-    }
+    # Create job (state shared by all workers)
+    filename = secure_filename(file.filename)
+    job_id = creer_job(filename)
     
     # Save file
-    filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    upload_folder = os.path.join(app.config['UPLOAD_FOLDER'], job_id)
+    os.makedirs(upload_folder, exist_ok=True)
+    filepath = os.path.join(upload_folder, filename)
     file.save(filepath)
     
     # Start background processing
-    thread = Thread(target=background_processing, args=(filepath,))
+    profilage = request.form.get('profilage') in ('1', 'true', 'on')
+    entite = request.form.get('entite', '').strip() or None
+    thread = Thread(target=background_processing, args=(job_id, filepath, profilage, entite))
     thread.start()
     
-    return jsonify({'status': 'processing_started'})
+    return jsonify({'status': 'processing_started', 'job_id': job_id})
 
 @app.route('/results')
 def results():
     # Check existing files
+    job_id = job_demande()
+    artefacts = lister_artefacts(job_id) if job_id else {}
     files = {
-        'grand_livre': os.path.exists('Grand_Livre_Consolidé.xlsx'),
-        'soldes': os.path.exists('soldes_par_feuille.xlsx'),
-        'etats_financiers': os.path.exists('Rapports_Financiers.xlsx')
+        'grand_livre': 'grand_livre' in artefacts,
+        'soldes': 'soldes' in artefacts,
+        'etats_financiers': 'rapports' in artefacts,
+        'anomalies': 'anomalies' in artefacts,
+        'profil': all(nom in artefacts for nom in FICHIERS_PROFIL)
     }
     
     # Load data if files exist
     soldes_data = None
     rapports_data = None
+    detail = {'categories': {}, 'comptes': {}}
     
     if files['soldes']:
         try:
-            soldes_df = pd.read_excel('soldes_par_feuille.xlsx', sheet_name='Soldes')
+            soldes_df = pd.read_excel(artefacts['soldes'], sheet_name='Soldes')
             soldes_df = soldes_df.dropna(subset=['Feuille'])
             soldes_df['Total Débit'] = soldes_df['Total Débit'].fillna(0)
             soldes_df['Total Crédit'] = soldes_df['Total Crédit'].fillna(0)
@@ -130,11 +147,14 @@ def results():
     
     if files['etats_financiers']:
         try:
-            bilan_df = pd.read_excel('Rapports_Financiers.xlsx', sheet_name='Bilan')
-            compte_resultat_df = pd.read_excel('Rapports_Financiers.xlsx', sheet_name='Compte de Résultat')
+            # Compte read as text: category rows have no account number
+            bilan_df = pd.read_excel(artefacts['rapports'], sheet_name='Bilan', dtype={'Compte': str})
+            compte_resultat_df = pd.read_excel(artefacts['rapports'], sheet_name='Compte de Résultat', dtype={'Compte': str})
             
             bilan_df = bilan_df.dropna(subset=['Désignation'])
             compte_resultat_df = compte_resultat_df.dropna(subset=['Désignation'])
+            bilan_df['Compte'] = bilan_df['Compte'].fillna('').str.strip()
+            compte_resultat_df['Compte'] = compte_resultat_df['Compte'].fillna('').str.strip()
             
             rapports_data = {
                 'bilan': bilan_df.to_dict('records'),
@@ -144,22 +164,54 @@ def results():
             app.logger.error(f"Erreur lecture rapports: {str(e)}")
             rapports_data = None
     
+    # Categories and accounts that can be drilled down to their entries
+    if all(nom in artefacts for nom in FICHIERS_DETAIL):
+        try:
+            detail = charger_index(artefacts['index_detail'])
+        except Exception as e:
+            app.logger.error(f"Erreur lecture index détail: {str(e)}")
+    
     return render_template(
         'results.html',
+        job_id=job_id,
         files=files,
         soldes_data=soldes_data,
-        rapports_data=rapports_data
+        rapports_data=rapports_data,
+        detail_categories=detail['categories'],
+        detail_comptes=detail['comptes']
     )
 
+@app.route('/drilldown')
+def drilldown():
+    job_id = job_demande()
+    artefacts = lister_artefacts(job_id) if job_id else {}
+    if not all(nom in artefacts for nom in FICHIERS_DETAIL):
+        return jsonify({'error': 'Détail des écritures non disponible'}), 404
+    
+    try:
+        gl, index = charger_detail(artefacts['detail_gl'], artefacts['index_detail'])
+        detail = lignes_detail(
+            gl, index,
+            categorie=request.args.get('categorie'),
+            compte=request.args.get('compte'),
+            page=request.args.get('page', 1, type=int),
+            par_page=request.args.get('par_page', LIGNES_PAR_PAGE, type=int)
+        )
+    except KeyError as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(detail)
+
 @app.route('/download/<filename>')
 def download(filename):
-    safe_files = {
-        'grand_livre': 'Grand_Livre_Consolidé.xlsx',
-        'soldes': 'soldes_par_feuille.xlsx',
-        'rapports': 'Rapports_Financiers.xlsx'
-    }
-    if filename in safe_files and os.path.exists(safe_files[filename]):
-        return send_file(safe_files[filename], as_attachment=True)
+    job_id = job_demande()
+    artefacts = lister_artefacts(job_id) if job_id else {}
+    telechargeables = {**FICHIERS_SORTIE, **FICHIERS_PROFIL}
+    if filename in telechargeables and filename in artefacts:
+        stockage_artefacts.toucher(artefacts[filename])
+        return send_file(os.path.abspath(artefacts[filename]), as_attachment=True, download_name=telechargeables[filename])
     return "Fichier non trouvé", 404
 
 @app.errorhandler(404)
@@ -0,0 +1,212 @@
+import fcntl
+import json
+import os
+import re
+import sys
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from outils_gl import SCHEMA_GL, bornes_periodes, cle_contenu, periodes_soldes, vers_table
+
+# === PARAMÈTRES ===
+DOSSIER_ARCHIVE = os.environ.get('DOSSIER_ARCHIVE', 'archive')
+
+# Clé des métadonnées de schéma contenant l'index compte -> lots
+CLE_INDEX = b'index_comptes'
+
+# Schéma des fichiers de l'archive : écritures du GL et identifiant du GL d'origine
+SCHEMA_ARCHIVE = SCHEMA_GL.append(pa.field('Source', pa.string()))
+
+# === FONCTIONS ===
+
+def dossier_entite(entite, dossier=DOSSIER_ARCHIVE):
+    """Dossier de l'archive d'une entité (nom assaini)."""
+    return os.path.join(dossier, re.sub(r'[^\w.-]+', '_', str(entite)).strip('_') or 'entite')
+
+def fichier_annee(entite, annee, dossier=DOSSIER_ARCHIVE):
+    """Fichier Arrow IPC d'un exercice de l'archive (année de fin de l'exercice)."""
+    return os.path.join(dossier_entite(entite, dossier), f"annee={int(annee)}.arrow")
+
+def annees_archivees(entite, dossier=DOSSIER_ARCHIVE):
+    """Liste triée des années présentes dans l'archive d'une entité."""
+    racine = dossier_entite(entite, dossier)
+    if not os.path.isdir(racine):
+        return []
+    return sorted(
+        int(m.group(1)) for m in (re.fullmatch(r'annee=(\d+)\.arrow', nom) for nom in os.listdir(racine)) if m
+    )
+
+def ecrire_annee(table, chemin):
+    """
+    Écrit une année : un lot (record batch) par compte, trié par date, et l'index
+    compte -> numéro de lot dans les métadonnées du schéma. Écriture atomique.
+    """
+    table = table.sort_by([('Compte', 'ascending'), ('Date', 'ascending')])
+    comptes = table.column('Compte').to_numpy(zero_copy_only=False)
+
+    # Bornes des plages contiguës de chaque compte
+    bornes = [0, *(np.flatnonzero(comptes[1:] != comptes[:-1]) + 1).tolist(), len(comptes)]
+    index = {str(comptes[debut]): n for n, debut in enumerate(bornes[:-1])}
+    schema = table.schema.with_metadata({CLE_INDEX: json.dumps(index, ensure_ascii=False).encode('utf-8')})
+
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    fd, temporaire = tempfile.mkstemp(dir=os.path.dirname(chemin), prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'wb') as sortie, pa.ipc.new_file(sortie, schema) as writer:
+            for debut, fin in zip(bornes, bornes[1:]):
+                writer.write_batch(table.slice(debut, fin - debut).combine_chunks().to_batches()[0])
+        os.replace(temporaire, chemin)
+    except BaseException:
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+        raise
+
+@contextmanager
+def verrou_entite(entite, dossier=DOSSIER_ARCHIVE):
+    """Verrou exclusif sur l'archive d'une entité (écritures concurrentes de plusieurs processus)."""
+    racine = dossier_entite(entite, dossier)
+    os.makedirs(racine, exist_ok=True)
+    with open(os.path.join(racine, '.verrou'), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def exercices_gl(gl, periodes=None):
+    """
+    Exercice de chaque écriture : année de fin de la période 'Solde' de sa feuille.
+    Feuilles sans période : exercice majoritaire du GL, à défaut l'année majoritaire
+    des dates (le GL n'est alors jamais réparti selon la date de ses écritures).
+    """
+    exercices = pd.Series(np.nan, index=gl.index)
+    if periodes:
+        fins = bornes_periodes(periodes)['Fin'].dt.year
+        exercices = gl['Feuille'].map(fins)
+
+    if exercices.isna().any():
+        connus = exercices.dropna()
+        if len(connus):
+            principal = connus.mode().iloc[0]
+        else:
+            annees = pd.to_datetime(gl['Date']).dt.year.dropna()
+            principal = annees.mode().iloc[0] if len(annees) else datetime.now().year
+        exercices = exercices.fillna(principal)
+
+    return exercices.astype(int).to_numpy()
+
+def lire_fichier_annee(chemin):
+    """Lit un fichier de l'archive en entier (table mappée en mémoire, sans copie)."""
+    return pa.ipc.open_file(pa.memory_map(chemin, 'r')).read_all()
+
+def archiver_gl(gl_consolide, entite, source, periodes=None, dossier=DOSSIER_ARCHIVE):
+    """
+    Ajoute un grand livre consolidé à l'archive de l'entité, partitionné par exercice
+    (d'après les périodes {feuille: 'JJ.MM.AAAA - JJ.MM.AAAA'}) et par compte.
+    Les écritures sont rattachées à `source` (identifiant du GL d'origine) : archiver de
+    nouveau la même source remplace ses écritures, celles des autres GL sont conservées.
+    """
+    if gl_consolide is None or gl_consolide.empty:
+        print("Aucune donnée à archiver.")
+        return []
+
+    exercices = exercices_gl(gl_consolide, periodes)
+    table = vers_table(gl_consolide)
+    table = table.append_column('Source', pa.repeat(pa.scalar(str(source)), table.num_rows))
+
+    fichiers = []
+    with verrou_entite(entite, dossier):
+        nouveaux = set(np.unique(exercices).tolist())
+        for annee in sorted(nouveaux | set(annees_archivees(entite, dossier))):
+            chemin = fichier_annee(entite, annee, dossier)
+            existant = lire_fichier_annee(chemin) if os.path.exists(chemin) else None
+            meme_source = None if existant is None else pc.equal(existant.column('Source'), str(source))
+
+            # Exercice sans écriture de cette source, ni avant ni maintenant : inchangé
+            if annee not in nouveaux and not pc.any(meme_source).as_py():
+                continue
+
+            morceaux = [] if existant is None else [existant.filter(pc.invert(pc.fill_null(meme_source, False)))]
+            if annee in nouveaux:
+                morceaux.append(table.filter(pa.array(exercices == annee)))
+            fusion = pa.concat_tables(morceaux)
+            if fusion.num_rows:
+                ecrire_annee(fusion, chemin)
+                fichiers.append(chemin)
+            else:
+                # Exercice qui ne contenait que des écritures de cette source, désormais classées ailleurs
+                os.remove(chemin)
+
+    print(f"Grand livre archivé pour {entite} : {', '.join(os.path.basename(f) for f in fichiers)}")
+    return fichiers
+
+def ouvrir_annee(entite, annee, dossier=DOSSIER_ARCHIVE):
+    """Ouvre un exercice en mémoire mappée ; retourne (lecteur IPC, index compte -> lot)."""
+    source = pa.memory_map(fichier_annee(entite, annee, dossier), 'r')
+    lecteur = pa.ipc.open_file(source)
+    index = json.loads(lecteur.schema.metadata[CLE_INDEX].decode('utf-8'))
+    return lecteur, index
+
+def lire_archive(entite, annees=None, comptes=None, dossier=DOSSIER_ARCHIVE):
+    """
+    Retourne une table Arrow des écritures des exercices/comptes demandés.
+    Les lots sont lus depuis les fichiers mappés en mémoire, sans copie.
+    """
+    annees = annees_archivees(entite, dossier) if annees is None else annees
+    comptes = None if comptes is None else [str(c) for c in comptes]
+
+    lots = []
+    for annee in annees:
+        lecteur, index = ouvrir_annee(entite, annee, dossier)
+        numeros = range(lecteur.num_record_batches) if comptes is None else [index[c] for c in comptes if c in index]
+        lots.extend(lecteur.get_batch(n) for n in numeros)
+
+    return pa.Table.from_batches(lots, schema=SCHEMA_ARCHIVE)
+
+def soldes_archive(entite, annees=None, comptes=None, dossier=DOSSIER_ARCHIVE):
+    """Balance par exercice ('Année') et par compte (Total Débit, Total Crédit, Solde) calculée sur l'archive."""
+    annees = annees_archivees(entite, dossier) if annees is None else annees
+
+    # Exercice de la partition (et non année de la date des écritures)
+    par_annee = []
+    for annee in annees:
+        table = lire_archive(entite, [annee], comptes, dossier)
+        agregat = table.group_by(['Compte', 'Nom du Compte']).aggregate([('Débit', 'sum'), ('Crédit', 'sum')])
+        par_annee.append(agregat.append_column('Année', pa.array([annee] * agregat.num_rows, pa.int64())))
+
+    colonnes = ['Année', 'Compte', 'Nom du Compte', 'Total Débit', 'Total Crédit']
+    if not par_annee:
+        return pd.DataFrame(columns=colonnes + ['Solde'])
+
+    soldes = pa.concat_tables(par_annee).to_pandas()
+    soldes = soldes.rename(columns={'Débit_sum': 'Total Débit', 'Crédit_sum': 'Total Crédit'})[colonnes]
+    soldes['Solde'] = (soldes['Total Débit'] - soldes['Total Crédit']).round(2)
+    return soldes.sort_values(['Compte', 'Année']).reset_index(drop=True)
+
+# === MAIN ===
+
+def main(arguments):
+    """
+    Usage :
+      python archive_gl.py ajouter <entité> <Grand_Livre_Consolidé.xlsx> [soldes_par_feuille.xlsx]
+      python archive_gl.py soldes <entité> [année ...]
+    """
+    if len(arguments) >= 3 and arguments[0] == 'ajouter':
+        periodes = None
+        if len(arguments) > 3:
+            periodes = periodes_soldes(pd.read_excel(arguments[3], sheet_name='Soldes'))
+        # Source : empreinte du fichier (l'archiver de nouveau remplace ses écritures)
+        source = cle_contenu(arguments[2])
+        archiver_gl(pd.read_excel(arguments[2], sheet_name='Grand Livre'), arguments[1], source, periodes)
+    elif len(arguments) >= 2 and arguments[0] == 'soldes':
+        annees = [int(a) for a in arguments[2:]] or None
+        print(soldes_archive(arguments[1], annees).to_string(index=False))
+    else:
+        print(main.__doc__)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
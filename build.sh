@@ -10,9 +10,9 @@ python -m pip install --upgrade pip==23.3.2
 pip install --no-cache-dir -r requirements.txt
 
 # Création des répertoires nécessaires
-mkdir -p uploads
-chmod -R 700 uploads
+mkdir -p uploads artefacts
+chmod -R 700 uploads artefacts
 
-# Nettoyage des éventuels fichiers temporaires
-find . -name "*.xlsx" -type f -delete
+# Nettoyage des éventuels fichiers temporaires (le stock d'artefacts est conservé)
+find . \( -path ./artefacts -o -path ./jobs \) -prune -o -name "*.xlsx" -type f -print0 | xargs -0 rm -f
 rm -rf __pycache__/
\ No newline at end of file
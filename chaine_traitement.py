@@ -0,0 +1,94 @@
+import os
+from contextlib import nullcontext
+from extraction_gl import consolider_gl, analyser_comptes
+from extraction_gl_EF import exporter_rapports, generer_bilan, generer_compte_resultat, charger_donnees
+from detail_gl import construire_index_detail, sauvegarder_detail, FICHIER_DETAIL_GL, FICHIER_INDEX_DETAIL
+from archive_gl import archiver_gl
+from anomalies_gl import detecter_anomalies, exporter_anomalies
+from profilage import Profilage, FICHIER_PSTATS, FICHIER_COLLAPSED, FICHIER_ALLOCATIONS
+from outils_gl import cle_contenu, periodes_soldes
+
+# === PARAMÈTRES ===
+
+# Fichiers produits par la chaîne, par nom d'artefact
+FICHIERS_SORTIE = {
+    'grand_livre': 'Grand_Livre_Consolidé.xlsx',
+    'soldes': 'soldes_par_feuille.xlsx',
+    'rapports': 'Rapports_Financiers.xlsx',
+    'anomalies': 'Anomalies_GL.xlsx'
+}
+
+# Index de navigation catégorie -> compte -> écritures (non téléchargeables)
+FICHIERS_DETAIL = {
+    'detail_gl': FICHIER_DETAIL_GL,
+    'index_detail': FICHIER_INDEX_DETAIL
+}
+
+# Fichiers de profilage (traitements lancés avec l'option profilage)
+FICHIERS_PROFIL = {
+    'profil_pstats': FICHIER_PSTATS,
+    'profil_collapsed': FICHIER_COLLAPSED,
+    'profil_allocations': FICHIER_ALLOCATIONS
+}
+
+# === FONCTIONS ===
+
+def executer_chaine(fichier_input, dossier_sortie, entite=None, source=None, profilage=False,
+                    suivi=None, produit=None):
+    """
+    Exécute la chaîne complète sur un grand livre : GL consolidé, soldes (et archive de
+    l'entité), revue des anomalies, états financiers et index du détail des écritures.
+
+    - `source` : identifiant du GL dans l'archive (par défaut l'empreinte de `fichier_input`) ;
+    - `profilage` : profil du traitement écrit dans `dossier_sortie` ;
+    - `suivi(message, avancement)` : appelé à chaque étape (avancement entre 0 et 1) ;
+    - `produit(nom, chemin)` : appelé pour chaque fichier produit, retourne son chemin
+      définitif (ex. après rangement dans le stock d'artefacts).
+
+    Retourne {nom d'artefact: chemin}.
+    """
+    suivi = suivi or (lambda message, avancement: None)
+    produit = produit or (lambda nom, chemin: chemin)
+    os.makedirs(dossier_sortie, exist_ok=True)
+    chemins = {
+        nom: os.path.join(dossier_sortie, fichier)
+        for nom, fichier in {**FICHIERS_SORTIE, **FICHIERS_DETAIL}.items()
+    }
+
+    with Profilage(dossier_sortie) if profilage else nullcontext() as profil:
+        suivi('Consolidation du grand livre...', 0.0)
+        gl_consolide = consolider_gl(fichier_input, chemins['grand_livre'])
+        if gl_consolide is None:
+            raise ValueError(f"Aucune donnée exploitable dans {fichier_input}")
+        chemins['grand_livre'] = produit('grand_livre', chemins['grand_livre'])
+
+        suivi('Analyse des soldes comptables...', 0.3)
+        df_soldes = analyser_comptes(gl_consolide, fichier_input, chemins['soldes'])
+        chemins['soldes'] = produit('soldes', chemins['soldes'])
+        periodes = periodes_soldes(df_soldes)
+        if entite:
+            # Archivé par exercice, d'après les périodes 'Solde' des feuilles
+            archiver_gl(gl_consolide, entite, source or cle_contenu(fichier_input), periodes)
+
+        suivi('Recherche des anomalies...', 0.45)
+        exporter_anomalies(detecter_anomalies(gl_consolide, periodes), chemins['anomalies'])
+        chemins['anomalies'] = produit('anomalies', chemins['anomalies'])
+
+        suivi('Génération des états financiers...', 0.6)
+        df = charger_donnees(chemins['soldes'])
+        bilan, bilan_details = generer_bilan(df)
+        resultat, resultat_details = generer_compte_resultat(df)
+        exporter_rapports(bilan, resultat, bilan_details, resultat_details, chemins['rapports'])
+        chemins['rapports'] = produit('rapports', chemins['rapports'])
+
+        suivi('Indexation des écritures...', 0.8)
+        gl_detail, index_detail = construire_index_detail(gl_consolide)
+        sauvegarder_detail(gl_detail, index_detail, chemins['detail_gl'], chemins['index_detail'])
+        for nom in FICHIERS_DETAIL:
+            chemins[nom] = produit(nom, chemins[nom])
+
+    if profil:
+        for nom, chemin in profil.fichiers.items():
+            chemins[nom] = produit(nom, chemin)
+
+    return chemins
@@ -0,0 +1,232 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+from extraction_gl_EF import CATEGORIES_BILAN, CATEGORIES_RESULTAT, categoriser_comptes, charger_donnees, preparer_soldes
+from gestion_jobs import lister_artefacts
+import stockage_artefacts
+
+# === PARAMÈTRES ===
+FICHIER_COMPARAISON = "Comparaison_Soldes.xlsx"
+
+# Préfixes désignant une exécution du pipeline plutôt qu'un fichier
+PREFIXE_JOB = 'job:'
+PREFIXE_CLE = 'cle:'
+
+# === FONCTIONS ===
+
+def fichier_soldes(source):
+    """
+    Chemin de la balance des soldes désignée par `source` : un fichier, 'job:<identifiant>'
+    (balance produite par un job) ou 'cle:<empreinte>' (artefact 'soldes' du stock).
+    """
+    source = str(source)
+    if source.startswith(PREFIXE_JOB):
+        chemin = lister_artefacts(source[len(PREFIXE_JOB):]).get('soldes')
+    elif source.startswith(PREFIXE_CLE):
+        chemin = (stockage_artefacts.chercher(source[len(PREFIXE_CLE):], ['soldes']) or {}).get('soldes')
+    else:
+        chemin = source if os.path.exists(source) else None
+    if chemin is None:
+        raise FileNotFoundError(f"Balance des soldes introuvable : {source}")
+    return chemin
+
+def charger_balance(source):
+    """Charge une balance des soldes depuis un DataFrame issu d'analyser_comptes, un fichier, un job ou le stock."""
+    if isinstance(source, pd.DataFrame):
+        return preparer_soldes(source)
+    return charger_donnees(fichier_soldes(source))
+
+def valeurs_par_compte(df):
+    """
+    Réduit une balance à une ligne par compte : Solde pour les comptes de bilan,
+    Mouvement pour les comptes de résultat.
+    """
+    categorie_bilan = categoriser_comptes(df['Compte'], CATEGORIES_BILAN)
+    categorie_resultat = categoriser_comptes(df['Compte'], CATEGORIES_RESULTAT)
+
+    valeurs = pd.DataFrame({
+        'Compte': df['Compte'],
+        'Nom du Compte': df['Nom du Compte'],
+        'Catégorie': categorie_bilan.fillna(categorie_resultat).fillna('Non classé'),
+        'État': np.where(categorie_bilan.notna(), 'Bilan', np.where(categorie_resultat.notna(), 'Résultat', '')),
+        'Valeur': np.where(categorie_resultat.notna() & categorie_bilan.isna(), df['Mouvement'], df['Solde'])
+    })
+
+    # Un compte peut apparaître sur plusieurs feuilles (ex. devises) : on les additionne
+    return valeurs.groupby('Compte', sort=False).agg({
+        'Nom du Compte': 'first',
+        'Catégorie': 'first',
+        'État': 'first',
+        'Valeur': 'sum'
+    })
+
+def lister_executions(sources):
+    """
+    Liste ordonnée (entité, libellé, source) des exécutions à comparer. Les clés de `sources`
+    sont des libellés (une seule entité) ou des couples (entité, libellé).
+    """
+    executions = []
+    for cle, source in sources.items():
+        entite, libelle = cle if isinstance(cle, tuple) else ('', cle)
+        executions.append((str(entite), str(libelle), source))
+
+    doublons = pd.Series([(e, l) for e, l, _ in executions]).duplicated()
+    if doublons.any():
+        entite, libelle, _ = executions[int(np.flatnonzero(doublons)[0])]
+        raise ValueError(f"Exécution en double pour l'entité '{entite}' et le libellé '{libelle}'.")
+    return executions
+
+def calculer_ecarts(valeurs, libelles, attendus):
+    """
+    Ajoute les écarts absolus et en pourcentage entre chaque exécution et la précédente.
+    L'écart est vide si l'entité n'a pas de balance pour l'une des deux exécutions.
+    """
+    ecarts = {}
+    for precedent, courant in zip(libelles, libelles[1:]):
+        ancien = valeurs[precedent]
+        nouveau = valeurs[courant]
+        comparable = attendus[precedent] & attendus[courant]
+        ecart = (nouveau.fillna(0) - ancien.fillna(0)).where(comparable)
+        base = ancien.abs().replace(0, np.nan)
+        ecarts[f"Écart {courant} / {precedent}"] = ecart.round(2)
+        ecarts[f"Écart % {courant} / {precedent}"] = (ecart / base * 100).round(2)
+    return pd.DataFrame(ecarts, index=valeurs.index)
+
+def statuts_comptes(presence, attendus):
+    """
+    Statut de chaque compte sur les exécutions de son entité : Présent, Apparu, Disparu
+    ou Intermittent (absent d'une exécution intermédiaire).
+    """
+    statut = pd.Series('', index=presence.index, dtype=object)
+    entites = presence.index.get_level_values('Entité')
+    for entite in entites.unique():
+        lignes = entites == entite
+        libelles_entite = [l for l in attendus.columns if attendus.loc[lignes, l].any()]
+        p = presence.loc[lignes, libelles_entite]
+        premier, dernier = p.iloc[:, 0], p.iloc[:, -1]
+        valeurs = np.select(
+            [premier & dernier, dernier, premier], ['Présent', 'Apparu', 'Disparu'], default='Intermittent'
+        )
+        statut[lignes] = np.where((valeurs == 'Présent') & ~p.all(axis=1), 'Intermittent', valeurs)
+    return statut.to_numpy()
+
+def comparer_soldes(sources):
+    """
+    Compare plusieurs balances des soldes : mapping ordonné libellé -> source, ou
+    (entité, libellé) -> source pour comparer plusieurs entités à la fois. Une source est
+    un DataFrame, un fichier, 'job:<identifiant>' ou 'cle:<empreinte>' (voir fichier_soldes).
+    Les comptes sont alignés sur (Entité, Compte) ; une colonne par libellé.
+    Retourne (comparaison par compte, comparaison par catégorie).
+    """
+    executions = lister_executions(sources)
+    libelles = list(dict.fromkeys(libelle for _, libelle, _ in executions))
+    if len(libelles) < 2:
+        raise ValueError("La comparaison nécessite au moins deux balances des soldes par entité.")
+
+    par_execution = []
+    for entite, libelle, source in executions:
+        df = valeurs_par_compte(charger_balance(source))
+        df.index = pd.MultiIndex.from_product([[entite], df.index], names=['Entité', 'Compte'])
+        par_execution.append((libelle, df))
+
+    # Une série par libellé (toutes entités), puis jointure unique sur (Entité, Compte)
+    valeurs = pd.concat(
+        [pd.concat([df['Valeur'] for l, df in par_execution if l == libelle]) for libelle in libelles],
+        axis=1, keys=libelles, join='outer'
+    )
+
+    # Désignation et catégorie : dernière exécution où le compte est présent
+    descriptifs = pd.concat(
+        [df[['Nom du Compte', 'Catégorie', 'État']] for _, df in reversed(par_execution)]
+    )
+    descriptifs = descriptifs[~descriptifs.index.duplicated(keep='first')].reindex(valeurs.index)
+
+    # Exécutions existantes pour l'entité de chaque ligne (un compte absent d'une balance vaut 0)
+    libelles_par_entite = {}
+    for entite, libelle, _ in executions:
+        libelles_par_entite.setdefault(entite, set()).add(libelle)
+    entites = valeurs.index.get_level_values('Entité')
+    attendus = pd.DataFrame(
+        {libelle: [libelle in libelles_par_entite[e] for e in entites] for libelle in libelles},
+        index=valeurs.index
+    )
+    montants = valeurs.fillna(0).where(attendus)
+
+    comptes = pd.concat([
+        descriptifs,
+        montants.round(2),
+        calculer_ecarts(valeurs, libelles, attendus)
+    ], axis=1)
+    comptes['Statut'] = statuts_comptes(valeurs.notna(), attendus)
+    comptes = comptes.sort_index().reset_index()
+
+    groupes = [entites, descriptifs['État'], descriptifs['Catégorie']]
+    categories = montants.groupby(groupes, sort=False).sum(min_count=1)
+    attendus_categories = attendus.groupby(groupes, sort=False).first()
+    categories = pd.concat(
+        [categories.round(2), calculer_ecarts(categories, libelles, attendus_categories)], axis=1
+    )
+    categories.index.names = ['Entité', 'État', 'Catégorie']
+    categories = categories.reset_index()
+
+    return comptes, categories
+
+def exporter_comparaison(comptes, categories, fichier_sortie=FICHIER_COMPARAISON):
+    """Exporte la comparaison dans un classeur Excel (feuilles 'Comptes' et 'Catégories')"""
+    with pd.ExcelWriter(fichier_sortie, engine='xlsxwriter') as writer:
+        workbook = writer.book
+        header_format = workbook.add_format({
+            'bold': True,
+            'bg_color': '#4472C4',
+            'font_color': 'white',
+            'border': 1
+        })
+        currency_format = workbook.add_format({'num_format': '#,##0.00'})
+        apparu_format = workbook.add_format({'bg_color': '#CCFFCC'})
+        disparu_format = workbook.add_format({'bg_color': '#FFCCCC'})
+
+        for nom_feuille, df in (('Comptes', comptes), ('Catégories', categories)):
+            df.to_excel(writer, sheet_name=nom_feuille, index=False)
+            worksheet = writer.sheets[nom_feuille]
+
+            for col_num, value in enumerate(df.columns.values):
+                worksheet.write(0, col_num, value, header_format)
+                largeur = 40 if value in ('Nom du Compte', 'Catégorie') else 18
+                worksheet.set_column(col_num, col_num, largeur, currency_format if df[value].dtype.kind == 'f' else None)
+
+            worksheet.freeze_panes(1, 0)
+            worksheet.autofilter(0, 0, len(df), len(df.columns) - 1)
+
+        if 'Statut' in comptes.columns and len(comptes):
+            col_statut = comptes.columns.get_loc('Statut')
+            plage = (1, col_statut, len(comptes), col_statut)
+            worksheet = writer.sheets['Comptes']
+            worksheet.conditional_format(*plage, {'type': 'cell', 'criteria': '==', 'value': '"Apparu"', 'format': apparu_format})
+            worksheet.conditional_format(*plage, {'type': 'cell', 'criteria': '==', 'value': '"Disparu"', 'format': disparu_format})
+
+    print(f"Comparaison des soldes sauvegardée dans : {fichier_sortie}")
+
+# === MAIN ===
+
+def main(arguments):
+    """
+    Usage : python comparaison_soldes.py [entité/]libellé=source [...]
+      source : fichier soldes_par_feuille.xlsx, job:<identifiant> ou cle:<empreinte>
+      ex.    : ACME/2023=job:3f2a... ACME/2024=job:9c41... BETA/2023=soldes_b23.xlsx BETA/2024=soldes_b24.xlsx
+    """
+    sources = {}
+    for argument in arguments:
+        libelle, _, source = argument.partition('=')
+        entite, _, libelle = libelle.rpartition('/')
+        sources[(entite, libelle) if entite else libelle] = source or libelle
+
+    if len(sources) < 2:
+        print(main.__doc__)
+        return
+
+    comptes, categories = comparer_soldes(sources)
+    exporter_comparaison(comptes, categories)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
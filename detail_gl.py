@@ -0,0 +1,124 @@
+import json
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from extraction_gl_EF import CATEGORIES_BILAN, CATEGORIES_RESULTAT, categoriser_comptes
+from outils_gl import vers_table
+
+# === PARAMÈTRES ===
+FICHIER_DETAIL_GL = "detail_gl.arrow"
+FICHIER_INDEX_DETAIL = "index_detail.json"
+
+LIGNES_PAR_PAGE = 100
+LIGNES_PAR_PAGE_MAX = 1000
+
+# Lignes par lot du fichier Arrow : une page ne touche que les lots qui la contiennent
+TAILLE_LOT = 65536
+
+COLONNES_DETAIL = [
+    'Date', 'Libellé', 'Compte', 'Nom du Compte', 'Montant', 'Devise',
+    'Origine', 'Origine_écriture', 'Document', 'Débit', 'Crédit', 'Feuille'
+]
+
+# === FONCTIONS ===
+
+def construire_index_detail(gl_consolide):
+    """
+    Trie le grand livre par compte puis par date et construit l'index
+    catégorie -> comptes -> plage de lignes [début, fin) dans le GL trié.
+    """
+    gl = gl_consolide[COLONNES_DETAIL].copy()
+    gl['Compte'] = gl['Compte'].astype(str).str.strip()
+    gl = gl.sort_values(['Compte', 'Date'], kind='mergesort').reset_index(drop=True)
+
+    comptes, debuts, nombres = np.unique(gl['Compte'].to_numpy(), return_index=True, return_counts=True)
+    plages = {
+        compte: [int(debut), int(debut + nombre)]
+        for compte, debut, nombre in zip(comptes, debuts, nombres)
+    }
+
+    categories = {}
+    serie_comptes = pd.Series(comptes, dtype=object)
+    for etat, definitions in (('Bilan', CATEGORIES_BILAN), ('Compte de Résultat', CATEGORIES_RESULTAT)):
+        for compte, categorie in zip(comptes, categoriser_comptes(serie_comptes, definitions)):
+            if categorie is not None:
+                categories.setdefault(categorie, {'etat': etat, 'comptes': []})['comptes'].append(str(compte))
+
+    return gl, {'comptes': plages, 'categories': categories}
+
+def sauvegarder_detail(gl, index, fichier_gl=FICHIER_DETAIL_GL, fichier_index=FICHIER_INDEX_DETAIL):
+    """Sauvegarde le GL trié (Arrow IPC, lisible en mémoire mappée) et son index (JSON)."""
+    table = vers_table(gl)
+    with pa.OSFile(fichier_gl, 'wb') as sortie, pa.ipc.new_file(sortie, table.schema) as writer:
+        writer.write_table(table, max_chunksize=TAILLE_LOT)
+    with open(fichier_index, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+
+@lru_cache(maxsize=32)
+def charger_index(fichier_index):
+    """Charge l'index catégorie -> comptes -> plages de lignes (quelques Ko, conservé en mémoire)."""
+    with open(fichier_index, encoding='utf-8') as f:
+        return json.load(f)
+
+@lru_cache(maxsize=16)
+def charger_detail(fichier_gl, fichier_index):
+    """
+    Ouvre le GL trié en mémoire mappée (table Arrow sans copie) et charge son index.
+    Coût mémoire par GL en cache : l'index et les métadonnées du fichier ; les lignes
+    ne sont lues qu'à la demande, par pages du fichier que le système peut libérer.
+    """
+    table = pa.ipc.open_file(pa.memory_map(fichier_gl, 'r')).read_all()
+    return table, charger_index(fichier_index)
+
+def lignes_detail(gl, index, categorie=None, compte=None, page=1, par_page=LIGNES_PAR_PAGE):
+    """
+    Retourne une page des écritures d'une catégorie ou d'un compte.
+    Seules les lignes de la page sont lues dans le GL (table Arrow) et converties.
+    """
+    if compte is not None:
+        if str(compte) not in index['comptes']:
+            raise KeyError(f"Compte inconnu : {compte}")
+        comptes = [str(compte)]
+    elif categorie is not None:
+        if categorie not in index['categories']:
+            raise KeyError(f"Catégorie inconnue : {categorie}")
+        comptes = index['categories'][categorie]['comptes']
+    else:
+        raise ValueError("Une catégorie ou un compte doit être indiqué.")
+
+    par_page = max(1, min(int(par_page), LIGNES_PAR_PAGE_MAX))
+    page = max(1, int(page))
+
+    plages = [index['comptes'][c] for c in comptes]
+    total = sum(fin - debut for debut, fin in plages)
+
+    # Sélection des lignes de la page à travers les plages successives
+    a_sauter = (page - 1) * par_page
+    restant = par_page
+    morceaux = []
+    for debut, fin in plages:
+        if restant <= 0:
+            break
+        taille = fin - debut
+        if a_sauter >= taille:
+            a_sauter -= taille
+            continue
+        debut_page = debut + a_sauter
+        fin_page = min(fin, debut_page + restant)
+        morceaux.append(gl.slice(debut_page, fin_page - debut_page))
+        restant -= fin_page - debut_page
+        a_sauter = 0
+
+    lignes = (pa.concat_tables(morceaux) if morceaux else gl.slice(0, 0)).to_pandas()
+
+    return {
+        'categorie': categorie,
+        'compte': compte,
+        'comptes': comptes,
+        'page': page,
+        'par_page': par_page,
+        'total': total,
+        'pages': (total + par_page - 1) // par_page,
+        'lignes': json.loads(lignes.to_json(orient='records', date_format='iso', force_ascii=False))
+    }
@@ -2,6 +2,14 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 import re
+from contextlib import closing
+from openpyxl import load_workbook
+
+# Nombre de lignes lues par bloc lors du parcours des feuilles
+TAILLE_BLOC = 50000
+
+# Nombre de lignes d'en-tête parcourues pour la période et le report de solde (I4)
+LIGNES_ENTETE = 10
 
 # Dictionary to translate transaction origins
 ORIGIN_TRANSLATIONS = {
@@ -46,6 +54,65 @@ def traduire_origine(origine):
     """Traduit le code d'origine en description complète."""
     return ORIGIN_TRANSLATIONS.get(origine, 'Inconnu')
 
+def ouvrir_classeur(fichier_input):
+    """
+    Ouvre le classeur en lecture seule pour un parcours ligne à ligne sans chargement complet.
+    Les dimensions déclarées des feuilles (balise <dimension>, souvent fausse dans les
+    exports) sont ignorées : chaque feuille est lue jusqu'à sa dernière ligne réelle.
+    """
+    wb = load_workbook(fichier_input, read_only=True, data_only=True)
+    for ws in wb.worksheets:
+        ws.reset_dimensions()
+    return closing(wb)
+
+def lire_entete_feuille(ws, nb_lignes=LIGNES_ENTETE):
+    """
+    Lit la période ('Solde JJ.MM.AAAA - JJ.MM.AAAA') et le report de solde (cellule I4)
+    à partir des premières lignes de la feuille uniquement.
+    Le report vaut None si la cellule I4 est hors de la feuille.
+    """
+    lignes = list(ws.iter_rows(min_row=1, max_row=nb_lignes, values_only=True))
+    # Sans dimensions, les lignes s'arrêtent à leur dernière cellule : largeur de l'en-tête
+    largeur = max((len(ligne) for ligne in lignes), default=0)
+    lignes = [ligne + (None,) * (largeur - len(ligne)) for ligne in lignes]
+
+    period_string = next(
+        (str(ligne[0]) for ligne in lignes if ligne and str(ligne[0]).startswith('Solde ')),
+        None
+    )
+
+    if len(lignes) < 4 or len(lignes[3]) < 9:
+        opening_balance = None
+    else:
+        opening_balance = lignes[3][8] if lignes[3][8] is not None else np.nan
+
+    return period_string, opening_balance
+
+def iterer_blocs_feuille(ws, taille_bloc=TAILLE_BLOC):
+    """
+    Génère les lignes de données d'une feuille par DataFrames de `taille_bloc` lignes.
+    La première ligne est utilisée comme en-tête de colonnes.
+    """
+    lignes = ws.iter_rows(values_only=True)
+    entete = next(lignes, None)
+    if entete is None:
+        return
+
+    colonnes = [col if col is not None else f"Unnamed: {i}" for i, col in enumerate(entete)]
+    largeur = len(colonnes)
+
+    bloc = []
+    bloc_emis = False
+    for ligne in lignes:
+        bloc.append(ligne[:largeur] + (None,) * (largeur - len(ligne)))
+        if len(bloc) >= taille_bloc:
+            yield pd.DataFrame(bloc, columns=colonnes)
+            bloc = []
+            bloc_emis = True
+
+    if bloc or not bloc_emis:
+        yield pd.DataFrame(bloc, columns=colonnes)
+
 def lire_reports_solde(fichier_input):
     """
     Lit les reports de solde et les périodes de chaque feuille dans le fichier Excel.
@@ -53,14 +120,15 @@ def lire_reports_solde(fichier_input):
     reports_solde = {}
 
     try:
-        with pd.ExcelFile(fichier_input) as xls:
-            for sheet_name in xls.sheet_names:
+        with ouvrir_classeur(fichier_input) as wb:
+            for sheet_name in wb.sheetnames:
                 try:
-                    df_sheet = pd.read_excel(xls, sheet_name=sheet_name, header=None)
+                    period_string, opening_balance = lire_entete_feuille(wb[sheet_name])
+                    if opening_balance is None:
+                        print(f"Erreur lors de la lecture de la feuille {sheet_name}: cellule I4 non trouvée")
+                        continue
 
                     # Extraction de la période
-                    period_row = df_sheet[df_sheet[0].astype(str).str.startswith('Solde ', na=False)]
-                    period_string = period_row.iloc[0, 0] if not period_row.empty else None
                     if period_string:
                         period = period_string.replace("Solde ", "")
                         date_debut_str = period.split(" - ")[0] if " - " in period else period
@@ -72,8 +140,6 @@ def lire_reports_solde(fichier_input):
                     else:
                         date_debut = None
 
-                    # Extraction du report de solde (cellule I4)
-                    opening_balance = df_sheet.iloc[3, 8] if df_sheet.iloc[3, 8] is not None else 0
                     compte = sheet_name.split('_')[1] if '_' in sheet_name else sheet_name
                     libelle = f"Solde à nouveau de compte {compte}"
 
@@ -95,10 +161,11 @@ def lire_reports_solde(fichier_input):
 
     return reports_solde
 
-def traiter_feuille(df_input, sheet_name):
-    """Traite une feuille du fichier Excel pour extraction des données."""
-    print(f"Traitement de la feuille : {sheet_name} en cours...")
-
+def preparer_bloc(df_input, sheet_name):
+    """
+    Applique les transformations ligne à ligne de `traiter_feuille` à un bloc de la feuille
+    (sélection des colonnes, conversions, filtrage des lignes vides, colonnes de compte).
+    """
     # Nettoyer les noms de colonnes et détecter la devise
     df_input.columns = df_input.columns.str.strip()
     debit_col, credit_col, devise = detecter_colonnes_monnaie(df_input.columns)
@@ -125,16 +192,6 @@ def traiter_feuille(df_input, sheet_name):
     df_input['Feuille'] = sheet_name
     df_input['Devise'] = devise
 
-    # Regrouper par document et calculer la somme des montants (Débit et Crédit)
-    montants_par_document = df_input.groupby('Document')[[debit_col, credit_col]].sum().reset_index()
-    montants_par_document = montants_par_document.rename(columns={debit_col: 'Total Débit', credit_col: 'Total Crédit'})
-
-    # Fusionner les montants totaux par document avec le DataFrame original
-    df_input = pd.merge(df_input, montants_par_document, on='Document', how='left')
-
-    # Calculer le montant total pour chaque ligne
-    df_input['Montant'] = df_input['Total Crédit'] + df_input['Total Débit']
-
     df_input['Origine_écriture'] = df_input['A'].map(traduire_origine)
 
     df_input = df_input.rename(columns={
@@ -145,12 +202,63 @@ def traiter_feuille(df_input, sheet_name):
         credit_col: 'Crédit'
     })
 
-    df_input = df_input[[
+    return df_input
+
+def totaliser_documents(df_bloc):
+    """Somme des montants Débit et Crédit par document pour un bloc préparé."""
+    return df_bloc.groupby('Document')[['Débit', 'Crédit']].sum()
+
+def finaliser_feuille(df_feuille, totaux_documents):
+    """Ajoute les totaux par document et le montant de chaque ligne, puis ordonne les colonnes."""
+    df_feuille['Total Débit'] = df_feuille['Document'].map(totaux_documents['Débit'])
+    df_feuille['Total Crédit'] = df_feuille['Document'].map(totaux_documents['Crédit'])
+
+    # Calculer le montant total pour chaque ligne
+    df_feuille['Montant'] = df_feuille['Total Crédit'] + df_feuille['Total Débit']
+
+    df_feuille = df_feuille[[
         'Date', 'Libellé', 'Compte', 'Nom du Compte', 'Montant', 'Devise',
         'Origine', 'Origine_écriture', 'Document', 'Débit', 'Crédit', 'Feuille'
     ]]
 
-    return df_input
+    return df_feuille
+
+def traiter_feuille(df_input, sheet_name):
+    """Traite une feuille du fichier Excel pour extraction des données."""
+    print(f"Traitement de la feuille : {sheet_name} en cours...")
+
+    df_input = preparer_bloc(df_input, sheet_name)
+    if df_input is None:
+        return None
+
+    # Regrouper par document et calculer la somme des montants (Débit et Crédit)
+    return finaliser_feuille(df_input, totaliser_documents(df_input))
+
+def traiter_feuille_par_blocs(ws, sheet_name, taille_bloc=TAILLE_BLOC):
+    """
+    Traite une feuille openpyxl en lecture seule bloc par bloc.
+    Seules les colonnes utiles des lignes non vides sont conservées entre les blocs ;
+    les totaux par document sont cumulés au fil de la lecture.
+    """
+    print(f"Traitement de la feuille : {sheet_name} en cours...")
+
+    blocs = []
+    totaux_documents = None
+
+    for df_bloc in iterer_blocs_feuille(ws, taille_bloc):
+        df_bloc = preparer_bloc(df_bloc, sheet_name)
+        if df_bloc is None:
+            return None
+
+        totaux_bloc = totaliser_documents(df_bloc)
+        totaux_documents = totaux_bloc if totaux_documents is None else totaux_documents.add(totaux_bloc, fill_value=0)
+        blocs.append(df_bloc)
+
+    if not blocs:
+        return None
+
+    df_feuille = pd.concat(blocs, ignore_index=True) if len(blocs) > 1 else blocs[0].reset_index(drop=True)
+    return finaliser_feuille(df_feuille, totaux_documents)
 
 def nettoyer_donnees(dataframe):
     """
@@ -163,9 +271,10 @@ def nettoyer_donnees(dataframe):
 
     return dataframe_nettoye
 
-def consolider_gl(fichier_input, fichier_output=None):
+def consolider_gl(fichier_input, fichier_output=None, taille_bloc=TAILLE_BLOC):
     """
     Consolide les données du grand livre à partir d'un fichier Excel.
+    Les feuilles sont lues par blocs de `taille_bloc` lignes.
     """
     if fichier_output is None:
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -175,12 +284,11 @@ def consolider_gl(fichier_input, fichier_output=None):
     reports_solde = lire_reports_solde(fichier_input)
     donnees_gl = []
 
-    with pd.ExcelFile(fichier_input) as xls:
-        for sheet_name in xls.sheet_names:
+    with ouvrir_classeur(fichier_input) as wb:
+        for sheet_name in wb.sheetnames:
             print(f"Traitement de la feuille {sheet_name}...")
             try:
-                df_input = pd.read_excel(xls, sheet_name=sheet_name)
-                df_traite = traiter_feuille(df_input, sheet_name)
+                df_traite = traiter_feuille_par_blocs(wb[sheet_name], sheet_name, taille_bloc)
 
                 if df_traite is not None:
                     donnees_gl.append(df_traite)
@@ -267,24 +375,21 @@ def analyser_comptes(gl_consolide, fichier_input, fichier_output="soldes_par_feu
     period_names = {}
     try:
         opening_balances = {}
-        with pd.ExcelFile(fichier_input) as xls:
-            for sheet_name in xls.sheet_names:
+        with ouvrir_classeur(fichier_input) as wb:
+            for sheet_name in wb.sheetnames:
                 try:
-                    df_sheet = pd.read_excel(xls, sheet_name=sheet_name, header=None)
+                    period_string, opening_balance = lire_entete_feuille(wb[sheet_name])
 
-                    period_row = df_sheet[df_sheet[0].astype(str).str.startswith('Solde ', na=False)]
-                    if not period_row.empty:
-                        period_string = period_row.iloc[0, 0]
-                        period_names[sheet_name] = period_string.replace("Solde ", "")
-                    else:
-                        period_names[sheet_name] = "Période inconnue"
-
-                    try:
-                        opening_balance = df_sheet.iloc[3, 8]
+                    if opening_balance is not None:
                         opening_balances[sheet_name] = opening_balance
-                    except IndexError:
+                    else:
                         print(f"Avertissement : Cellule I4 non trouvée dans la feuille {sheet_name}. Définition du solde initial à 0.")
                         opening_balances[sheet_name] = 0
+
+                    if period_string:
+                        period_names[sheet_name] = period_string.replace("Solde ", "")
+                    else:
+                        period_names[sheet_name] = "Période inconnue"
                 except Exception as e:
                     print(f"Erreur lors de la lecture du report de solde pour la feuille {sheet_name}: {str(e)}")
                     opening_balances[sheet_name] = 0
@@ -1,4 +1,5 @@
 import pandas as pd
+import numpy as np
 import os
 import re
 
@@ -119,14 +120,18 @@ RATIOS = {
 
 # === FONCTIONS ===
 
-def charger_donnees():
+def charger_donnees(fichier_soldes=FICHIER_SOLDES):
     """Charge et nettoie les données comptables"""
     # Assurez-vous que extraction_gl a été exécuté et a généré le fichier
-    if not os.path.exists(FICHIER_SOLDES):
-        print(f"Erreur: Le fichier '{FICHIER_SOLDES}' n'existe pas.  Assurez-vous que extraction_gl.py a été exécuté en premier.")
+    if not os.path.exists(fichier_soldes):
+        print(f"Erreur: Le fichier '{fichier_soldes}' n'existe pas.  Assurez-vous que extraction_gl.py a été exécuté en premier.")
         return None
     
-    df = pd.read_excel(FICHIER_SOLDES)
+    return preparer_soldes(pd.read_excel(fichier_soldes))
+
+def preparer_soldes(df):
+    """Normalise une balance des soldes (fichier ou résultat d'analyser_comptes) : Compte, Mouvement et Solde"""
+    df = df.copy()
     df['Compte'] = df['Compte'].astype(str).str.strip()
     df['Total Débit'] = pd.to_numeric(df['Total Débit'], errors='coerce').fillna(0)
     df['Total Crédit'] = pd.to_numeric(df['Total Crédit'], errors='coerce').fillna(0)
@@ -157,6 +162,26 @@ def appartient_a(compte: str, filtres) -> bool:
                 continue
     return False
 
+def categoriser_comptes(comptes, categories, defaut=None):
+    """
+    Version vectorisée d'appartient_a : retourne, pour chaque compte de la série,
+    la première catégorie correspondante (ou `defaut`).
+    """
+    comptes = comptes.astype(str)
+    numeros = pd.to_numeric(comptes, errors='coerce')
+    masques = []
+    for filtres in categories.values():
+        prefixes = tuple(f for f in filtres if isinstance(f, str))
+        masque = comptes.str.startswith(prefixes) if prefixes else pd.Series(False, index=comptes.index)
+        for f in filtres:
+            if isinstance(f, tuple) and len(f) == 2:
+                masque |= numeros.between(int(f[0]), int(f[1]))
+        masques.append(masque.to_numpy())
+    return pd.Series(
+        np.select(masques, list(categories.keys()), default=defaut) if masques else defaut,
+        index=comptes.index, dtype=object
+    )
+
 def generer_bilan(df):
     """Génère le bilan selon les catégories définies"""
     result = {}
@@ -195,12 +220,12 @@ def generer_compte_resultat(df):
     resultat_df = pd.DataFrame.from_dict(result, orient='index', columns=['Montant'])
     return resultat_df, details
 
-def exporter_rapports(df_bilan, df_resultat, bilan_details, resultat_details):
+def exporter_rapports(df_bilan, df_resultat, bilan_details, resultat_details, fichier_sortie=FICHIER_SORTIE):
     """Exporte les rapports dans un fichier Excel"""
     # Ajouter "Résultat de l'exercice" au DataFrame avant l'exportation
     df_resultat.loc['Résultat de l\'exercice'] = df_resultat['Montant'].sum()
 
-    with pd.ExcelWriter(FICHIER_SORTIE) as writer:
+    with pd.ExcelWriter(fichier_sortie) as writer:
         # Préparer les données pour le Bilan
         bilan_output = pd.DataFrame(columns=['Compte', 'Désignation', 'Montant'])
         row_start_bilan = 0
@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import time
+import uuid
+
+# === PARAMÈTRES ===
+DOSSIER_JOBS = os.environ.get('DOSSIER_JOBS', 'jobs')
+FICHIER_BASE = os.path.join(DOSSIER_JOBS, 'jobs.sqlite3')
+
+# Champs d'état exposés par /progress
+CHAMPS_ETAT = ('current', 'total', 'message', 'completed', 'error')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    fichier TEXT,
+    cree_le REAL NOT NULL,
+    maj_le REAL NOT NULL,
+    current INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    message TEXT NOT NULL DEFAULT '',
+    completed INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS artefacts (
+    job_id TEXT NOT NULL REFERENCES jobs(job_id),
+    nom TEXT NOT NULL,
+    chemin TEXT NOT NULL,
+    PRIMARY KEY (job_id, nom)
+);
+"""
+
+# === FONCTIONS ===
+
+def connexion():
+    """
+    Ouvre une connexion à la base des jobs partagée entre les workers.
+    Le mode WAL permet des lectures concurrentes pendant qu'un worker écrit.
+    """
+    os.makedirs(DOSSIER_JOBS, exist_ok=True)
+    conn = sqlite3.connect(FICHIER_BASE, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+def dossier_job(job_id):
+    """Retourne le dossier des fichiers (entrée et sorties) d'un job."""
+    return os.path.join(DOSSIER_JOBS, job_id)
+
+def creer_job(fichier):
+    """Crée un job et son dossier d'artefacts, et retourne son identifiant."""
+    job_id = uuid.uuid4().hex
+    os.makedirs(dossier_job(job_id), exist_ok=True)
+    maintenant = time.time()
+
+    conn = connexion()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, fichier, cree_le, maj_le, message) VALUES (?, ?, ?, ?, ?)",
+                (job_id, fichier, maintenant, maintenant, 'Initialisation...')
+            )
+    finally:
+        conn.close()
+
+    return job_id
+
+def maj_job(job_id, **champs):
+    """Met à jour les champs d'état (current, total, message, completed, error) d'un job."""
+    inconnus = set(champs) - set(CHAMPS_ETAT)
+    if inconnus:
+        raise ValueError(f"Champs d'état inconnus : {inconnus}")
+    if not champs:
+        return
+
+    affectations = ', '.join(f"{champ} = ?" for champ in champs)
+    conn = connexion()
+    try:
+        with conn:
+            conn.execute(
+                f"UPDATE jobs SET {affectations}, maj_le = ? WHERE job_id = ?",
+                (*champs.values(), time.time(), job_id)
+            )
+    finally:
+        conn.close()
+
+def lire_job(job_id):
+    """Retourne l'état d'un job sous forme de dictionnaire, ou None s'il n'existe pas."""
+    conn = connexion()
+    try:
+        ligne = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+
+    if ligne is None:
+        return None
+
+    job = dict(ligne)
+    job['completed'] = bool(job['completed'])
+    return job
+
+def dernier_job():
+    """Retourne l'identifiant du job le plus récent, ou None."""
+    conn = connexion()
+    try:
+        ligne = conn.execute("SELECT job_id FROM jobs ORDER BY cree_le DESC LIMIT 1").fetchone()
+    finally:
+        conn.close()
+    return ligne['job_id'] if ligne else None
+
+def enregistrer_artefact(job_id, nom, chemin):
+    """Associe un fichier produit (ex. 'grand_livre') à un job."""
+    conn = connexion()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO artefacts (job_id, nom, chemin) VALUES (?, ?, ?)",
+                (job_id, nom, chemin)
+            )
+    finally:
+        conn.close()
+
+def lister_artefacts(job_id):
+    """Retourne les fichiers produits par un job sous la forme {nom: chemin} (fichiers existants uniquement)."""
+    conn = connexion()
+    try:
+        lignes = conn.execute("SELECT nom, chemin FROM artefacts WHERE job_id = ?", (job_id,)).fetchall()
+    finally:
+        conn.close()
+    return {ligne['nom']: ligne['chemin'] for ligne in lignes if os.path.exists(ligne['chemin'])}
@@ -0,0 +1,67 @@
+import hashlib
+import re
+import pandas as pd
+import pyarrow as pa
+
+# === PARAMÈTRES ===
+TAILLE_LECTURE = 1024 * 1024
+
+# Écritures d'un grand livre consolidé au format Arrow (archive, détail des écritures)
+SCHEMA_GL = pa.schema([
+    ('Date', pa.timestamp('ms')),
+    ('Libellé', pa.string()),
+    ('Compte', pa.string()),
+    ('Nom du Compte', pa.string()),
+    ('Montant', pa.float64()),
+    ('Devise', pa.string()),
+    ('Origine', pa.string()),
+    ('Origine_écriture', pa.string()),
+    ('Document', pa.string()),
+    ('Débit', pa.float64()),
+    ('Crédit', pa.float64()),
+    ('Feuille', pa.string()),
+])
+
+# === FONCTIONS ===
+
+def cle_contenu(chemin):
+    """Calcule la clé (SHA-256 du contenu) d'un fichier, lu par blocs."""
+    empreinte = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(TAILLE_LECTURE), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+def periodes_soldes(df_soldes):
+    """Périodes {feuille: 'JJ.MM.AAAA - JJ.MM.AAAA'} du rapport des soldes (analyser_comptes)."""
+    return dict(zip(df_soldes['Feuille'], df_soldes['Période']))
+
+def bornes_periodes(periodes):
+    """Convertit {feuille: 'JJ.MM.AAAA - JJ.MM.AAAA'} en DataFrame des dates de début et de fin."""
+    lignes = []
+    for feuille, periode in periodes.items():
+        dates = re.findall(r'\d{2}\.\d{2}\.\d{4}', str(periode))
+        if len(dates) == 2:
+            lignes.append((feuille, dates[0], dates[1]))
+    bornes = pd.DataFrame(lignes, columns=['Feuille', 'Début', 'Fin']).set_index('Feuille')
+    bornes['Début'] = pd.to_datetime(bornes['Début'], format='%d.%m.%Y', errors='coerce')
+    bornes['Fin'] = pd.to_datetime(bornes['Fin'], format='%d.%m.%Y', errors='coerce')
+    return bornes
+
+def texte(valeur):
+    """Valeur en texte ; les nombres entiers lus comme flottants (ex. n° de document 81.0) sans décimale."""
+    if valeur is None:
+        return None
+    if isinstance(valeur, float) and valeur.is_integer():
+        return str(int(valeur))
+    return str(valeur)
+
+def vers_table(gl):
+    """Convertit un grand livre consolidé en table Arrow (schéma SCHEMA_GL)."""
+    gl = gl[SCHEMA_GL.names].copy()
+    for champ in SCHEMA_GL:
+        if pa.types.is_string(champ.type):
+            # Colonnes mixtes (ex. Document numérique ou 'Solde initial') : texte, valeurs manquantes conservées
+            gl[champ.name] = gl[champ.name].astype(object).where(gl[champ.name].notna(), None).map(texte)
+    gl['Date'] = pd.to_datetime(gl['Date']).astype('datetime64[ms]')
+    return pa.Table.from_pandas(gl, schema=SCHEMA_GL, preserve_index=False)
@@ -0,0 +1,177 @@
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# === PARAMÈTRES ===
+FICHIER_PSTATS = "profil.pstats"
+FICHIER_COLLAPSED = "profil.collapsed"
+FICHIER_ALLOCATIONS = "profil_allocations.json"
+
+INTERVALLE_ECHANTILLONNAGE = 0.005  # secondes entre deux relevés de pile
+
+# tracemalloc ne distingue pas les threads : les mesures mémoire couvrent tout le processus
+PORTEE_ALLOCATIONS = (
+    "Mémoire mesurée pour tout le processus (tracemalloc) : pic_octets et alloue_octets "
+    "incluent les allocations des autres threads actifs pendant l'appel (autres traitements "
+    "d'un worker à threads). Les durées et nombres d'appels ne concernent que le traitement profilé."
+)
+
+# Fonctions instrumentées (module, nom) : temps et pic d'allocation par appel
+FONCTIONS_SUIVIES = [
+    ('extraction_gl', 'traiter_feuille'),
+    ('extraction_gl', 'traiter_feuille_par_blocs'),
+    ('extraction_gl', 'analyser_comptes'),
+    ('extraction_gl', 'sauvegarder_excel'),
+    ('extraction_gl_EF', 'exporter_rapports'),
+]
+
+# tracemalloc et l'instrumentation sont globaux au processus : un seul profilage à la fois
+_verrou = threading.Lock()
+
+# === FONCTIONS ===
+
+def pile_collapsed(frame):
+    """Pile d'appels au format 'collapsed' (racine en premier, séparée par ';')."""
+    elements = []
+    while frame is not None:
+        code = frame.f_code
+        elements.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(elements))
+
+class EchantillonneurPile(threading.Thread):
+    """Relève périodiquement la pile d'un thread et compte les piles identiques."""
+
+    def __init__(self, thread_id, intervalle=INTERVALLE_ECHANTILLONNAGE):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.intervalle = intervalle
+        self.piles = Counter()
+        self._arret = threading.Event()
+
+    def run(self):
+        while not self._arret.wait(self.intervalle):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.piles[pile_collapsed(frame)] += 1
+
+    def arreter(self):
+        self._arret.set()
+        self.join()
+
+class Profilage:
+    """
+    Contexte de profilage d'un traitement : cProfile (fichier pstats), échantillonnage
+    de pile (fichier collapsed pour flamegraph) et allocations des fonctions suivies
+    (mesurées pour tout le processus, voir PORTEE_ALLOCATIONS).
+    """
+
+    def __init__(self, dossier_sortie):
+        self.dossier_sortie = dossier_sortie
+        self.fichiers = {
+            'profil_pstats': os.path.join(dossier_sortie, FICHIER_PSTATS),
+            'profil_collapsed': os.path.join(dossier_sortie, FICHIER_COLLAPSED),
+            'profil_allocations': os.path.join(dossier_sortie, FICHIER_ALLOCATIONS),
+        }
+        self.allocations = {}
+        self._originaux = []
+        self._profileur = None
+        self._echantillonneur = None
+        self._profondeur = 0
+        self._thread_id = None
+
+    def _instrumenter(self, nom, fonction):
+        stats = self.allocations.setdefault(nom, {'appels': 0, 'duree_s': 0.0, 'pic_octets': 0, 'alloue_octets': 0})
+
+        @functools.wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            # Les appels d'autres threads (traitements non profilés) ne sont pas comptés
+            if threading.get_ident() != self._thread_id:
+                return fonction(*args, **kwargs)
+            exterieur = self._profondeur == 0
+            self._profondeur += 1
+            if exterieur:
+                tracemalloc.reset_peak()
+            avant, _ = tracemalloc.get_traced_memory()
+            debut = time.perf_counter()
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                self._profondeur -= 1
+                apres, pic = tracemalloc.get_traced_memory()
+                stats['appels'] += 1
+                stats['duree_s'] += time.perf_counter() - debut
+                stats['alloue_octets'] += max(0, apres - avant)
+                if exterieur:
+                    stats['pic_octets'] = max(stats['pic_octets'], pic - avant)
+
+        return enveloppe
+
+    def _remplacer_fonctions(self):
+        """Remplace les fonctions suivies partout où elles ont été importées (modules déjà chargés)."""
+        for nom_module, nom in FONCTIONS_SUIVIES:
+            module = sys.modules.get(nom_module)
+            originale = getattr(module, nom, None)
+            if originale is None:
+                continue
+            enveloppe = self._instrumenter(nom, originale)
+            for autre in list(sys.modules.values()):
+                if getattr(autre, nom, None) is originale:
+                    setattr(autre, nom, enveloppe)
+                    self._originaux.append((autre, nom, originale))
+
+    def _restaurer_fonctions(self):
+        for module, nom, originale in reversed(self._originaux):
+            setattr(module, nom, originale)
+        self._originaux = []
+
+    def __enter__(self):
+        _verrou.acquire()
+        try:
+            os.makedirs(self.dossier_sortie, exist_ok=True)
+            tracemalloc.start()
+            self._thread_id = threading.get_ident()
+            self._remplacer_fonctions()
+            self._echantillonneur = EchantillonneurPile(self._thread_id)
+            self._echantillonneur.start()
+            self._profileur = cProfile.Profile()
+            self._profileur.enable()
+        except BaseException:
+            # Mise en place incomplète : tout défaire pour ne pas bloquer les profilages suivants
+            if self._echantillonneur is not None and self._echantillonneur.is_alive():
+                self._echantillonneur.arreter()
+            self._restaurer_fonctions()
+            tracemalloc.stop()
+            _verrou.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self._profileur.disable()
+            self._echantillonneur.arreter()
+            self._restaurer_fonctions()
+            tracemalloc.stop()
+            self.sauvegarder()
+        finally:
+            _verrou.release()
+        return False
+
+    def sauvegarder(self):
+        """Écrit les fichiers pstats, collapsed et allocations."""
+        self._profileur.dump_stats(self.fichiers['profil_pstats'])
+
+        with open(self.fichiers['profil_collapsed'], 'w', encoding='utf-8') as f:
+            for pile, nombre in self._echantillonneur.piles.most_common():
+                f.write(f"{pile} {nombre}\n")
+
+        with open(self.fichiers['profil_allocations'], 'w', encoding='utf-8') as f:
+            json.dump({'portee': PORTEE_ALLOCATIONS, 'fonctions': self.allocations}, f, ensure_ascii=False, indent=2)
+
+        print(f"Profil sauvegardé dans : {self.dossier_sortie}")
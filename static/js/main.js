@@ -65,6 +65,13 @@ document.addEventListener('DOMContentLoaded', function() {
 
         const formData = new FormData();
         formData.append('file', fileInput.files[0]);
+        const entite = document.getElementById('entite-input').value.trim();
+        if (entite) {
+            formData.append('entite', entite);
+        }
+        if (document.getElementById('profilage-input').checked) {
+            formData.append('profilage', '1');
+        }
 
         try {
             submitBtn.disabled = true;
@@ -81,7 +88,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 throw new Error(data.error || 'Erreur lors du traitement');
             }
 
-            monitorProgress();
+            monitorProgress(data.job_id);
         } catch (error) {
             submitBtn.disabled = false;
             hideProgressBar();
@@ -111,14 +118,14 @@ document.addEventListener('DOMContentLoaded', function() {
         }, 5000);
     }
 
-    function monitorProgress() {
+    function monitorProgress(jobId) {
         const progressBar = document.getElementById('progress-bar');
         const progressText = document.getElementById('progress-text');
         const progressPercent = document.getElementById('progress-percent');
 
         const checkInterval = setInterval(async () => {
             try {
-                const response = await fetch('/progress');
+                const response = await fetch(`/progress?job_id=${encodeURIComponent(jobId)}`);
                 const data = await response.json();
 
                 if (data.error) {
@@ -138,7 +145,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 if (data.completed) {
                     clearInterval(checkInterval);
                     setTimeout(() => {
-                        window.location.href = '/results';
+                        window.location.href = `/results?job_id=${encodeURIComponent(jobId)}`;
                     }, 1500);
                 }
             } catch (error) {
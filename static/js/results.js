@@ -5,11 +5,94 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize charts
     initCharts();
     
+    // Initialize drill-down from statement lines to GL entries
+    initDrilldown();
+    
     // Add print button functionality
     document.getElementById('print-btn').addEventListener('click', function() {
         window.print();
     });
 
+    function initDrilldown() {
+        const jobId = document.getElementById('results-root').dataset.jobId;
+        const modalElement = document.getElementById('drilldownModal');
+        const modal = new bootstrap.Modal(modalElement);
+        const body = document.getElementById('drilldown-body');
+        const info = document.getElementById('drilldown-info');
+        const prevBtn = document.getElementById('drilldown-prev');
+        const nextBtn = document.getElementById('drilldown-next');
+        let filtre = null;
+        let page = 1;
+
+        document.querySelectorAll('.drilldown-row').forEach(row => {
+            row.style.cursor = 'pointer';
+            row.addEventListener('click', () => {
+                filtre = row.dataset.compte
+                    ? { compte: row.dataset.compte }
+                    : { categorie: row.dataset.categorie };
+                document.getElementById('drilldownTitle').textContent =
+                    filtre.compte ? `Écritures du compte ${filtre.compte}` : `Écritures : ${filtre.categorie}`;
+                loadPage(1);
+                modal.show();
+            });
+        });
+
+        prevBtn.addEventListener('click', () => loadPage(page - 1));
+        nextBtn.addEventListener('click', () => loadPage(page + 1));
+
+        async function loadPage(numero) {
+            const params = new URLSearchParams({ ...filtre, page: numero });
+            if (jobId) {
+                params.set('job_id', jobId);
+            }
+
+            body.innerHTML = '';
+            info.textContent = 'Chargement...';
+
+            try {
+                const response = await fetch(`/drilldown?${params}`);
+                const data = await response.json();
+                if (!response.ok) {
+                    throw new Error(data.error || 'Erreur lors du chargement');
+                }
+
+                page = data.page;
+                data.lignes.forEach(ligne => {
+                    const tr = document.createElement('tr');
+                    [
+                        ligne['Date'] ? ligne['Date'].slice(0, 10) : '',
+                        ligne['Compte'],
+                        ligne['Libellé'],
+                        ligne['Document'],
+                        ligne['Origine_écriture'],
+                        formatMontant(ligne['Débit']),
+                        formatMontant(ligne['Crédit'])
+                    ].forEach((valeur, i) => {
+                        const td = document.createElement('td');
+                        td.textContent = valeur ?? '';
+                        if (i >= 5) {
+                            td.className = 'montant';
+                        }
+                        tr.appendChild(td);
+                    });
+                    body.appendChild(tr);
+                });
+
+                info.textContent = `${data.total} écriture(s) - page ${data.page} / ${Math.max(data.pages, 1)}`;
+                prevBtn.disabled = data.page <= 1;
+                nextBtn.disabled = data.page >= data.pages;
+            } catch (error) {
+                info.textContent = error.message;
+                prevBtn.disabled = true;
+                nextBtn.disabled = true;
+            }
+        }
+
+        function formatMontant(valeur) {
+            return valeur ? valeur.toLocaleString('fr-CH', { minimumFractionDigits: 2, maximumFractionDigits: 2 }) : '';
+        }
+    }
+
     function initFinancialRatios() {
         const bilanData = extractBilanData();
         
@@ -0,0 +1,222 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from outils_gl import cle_contenu, TAILLE_LECTURE
+
+# === PARAMÈTRES ===
+DOSSIER_ARTEFACTS = os.environ.get('DOSSIER_ARTEFACTS', 'artefacts')
+FICHIER_INDEX = os.path.join(DOSSIER_ARTEFACTS, 'index.sqlite3')
+
+# Taille totale maximale du stock (octets) et durée de vie depuis le dernier accès (secondes)
+QUOTA_OCTETS = int(os.environ.get('QUOTA_ARTEFACTS_OCTETS', 2 * 1024 ** 3))
+DUREE_VIE_SECONDES = int(os.environ.get('DUREE_VIE_ARTEFACTS_SECONDES', 30 * 24 * 3600))
+
+# Durée maximale d'un bail (entrée en cours d'utilisation, protégée de l'éviction) :
+# au-delà, le porteur est considéré comme arrêté et le bail est ignoré
+DUREE_BAIL_SECONDES = int(os.environ.get('DUREE_BAIL_ARTEFACTS_SECONDES', 6 * 3600))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entrees (
+    cle TEXT PRIMARY KEY,
+    cree_le REAL NOT NULL,
+    acces_le REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fichiers (
+    cle TEXT NOT NULL REFERENCES entrees(cle),
+    nom TEXT NOT NULL,
+    chemin TEXT NOT NULL,
+    taille INTEGER NOT NULL,
+    PRIMARY KEY (cle, nom)
+);
+CREATE INDEX IF NOT EXISTS idx_fichiers_chemin ON fichiers(chemin);
+CREATE TABLE IF NOT EXISTS baux (
+    cle TEXT NOT NULL,
+    porteur TEXT NOT NULL,
+    expire_le REAL NOT NULL,
+    PRIMARY KEY (cle, porteur)
+);
+"""
+
+# === FONCTIONS ===
+
+def connexion():
+    """Ouvre l'index du stock d'artefacts (SQLite en mode WAL, partagé entre les workers)."""
+    os.makedirs(DOSSIER_ARTEFACTS, exist_ok=True)
+    conn = sqlite3.connect(FICHIER_INDEX, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+def dossier_entree(cle):
+    """Retourne le dossier d'une entrée du stock."""
+    return os.path.join(DOSSIER_ARTEFACTS, cle[:2], cle)
+
+def ecrire_atomique(source, destination, deplacer=False):
+    """
+    Copie (ou déplace) `source` vers `destination` via un fichier temporaire du même dossier,
+    de sorte qu'un lecteur ne voie jamais un fichier partiellement écrit.
+    """
+    dossier = os.path.dirname(destination) or '.'
+    os.makedirs(dossier, exist_ok=True)
+
+    fd, temporaire = tempfile.mkstemp(dir=dossier, prefix='.tmp_')
+    try:
+        with os.fdopen(fd, 'wb') as sortie, open(source, 'rb') as entree:
+            shutil.copyfileobj(entree, sortie, TAILLE_LECTURE)
+            sortie.flush()
+            os.fsync(sortie.fileno())
+        os.replace(temporaire, destination)
+    except BaseException:
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+        raise
+
+    if deplacer:
+        os.remove(source)
+
+def stocker(cle, nom, source, deplacer=False):
+    """
+    Range le fichier `source` sous le nom d'artefact `nom` dans l'entrée `cle`,
+    puis applique le quota. Retourne le chemin stocké.
+    Le fichier stocké est nommé d'après `nom` (extension de `source` conservée) :
+    un artefact déjà présent est remplacé, quel que soit le nom du fichier d'origine.
+    """
+    destination = os.path.join(dossier_entree(cle), nom + os.path.splitext(source)[1])
+    ecrire_atomique(source, destination, deplacer=deplacer)
+    maintenant = time.time()
+
+    conn = connexion()
+    try:
+        precedent = conn.execute(
+            "SELECT chemin FROM fichiers WHERE cle = ? AND nom = ?", (cle, nom)
+        ).fetchone()
+        with conn:
+            conn.execute(
+                "INSERT INTO entrees (cle, cree_le, acces_le) VALUES (?, ?, ?) "
+                "ON CONFLICT(cle) DO UPDATE SET acces_le = excluded.acces_le",
+                (cle, maintenant, maintenant)
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO fichiers (cle, nom, chemin, taille) VALUES (?, ?, ?, ?)",
+                (cle, nom, destination, os.path.getsize(destination))
+            )
+    finally:
+        conn.close()
+
+    # Fichier de l'artefact remplacé, s'il portait un autre nom (extension différente)
+    if precedent and precedent['chemin'] != destination and os.path.exists(precedent['chemin']):
+        os.remove(precedent['chemin'])
+
+    purger(cle_protegee=cle)
+    return destination
+
+def chercher(cle, noms):
+    """
+    Retourne {nom: chemin} si tous les artefacts `noms` de l'entrée `cle` sont présents,
+    None sinon. Un succès compte comme un accès pour l'éviction LRU.
+    """
+    conn = connexion()
+    try:
+        lignes = conn.execute("SELECT nom, chemin FROM fichiers WHERE cle = ?", (cle,)).fetchall()
+        fichiers = {ligne['nom']: ligne['chemin'] for ligne in lignes if os.path.exists(ligne['chemin'])}
+        if not all(nom in fichiers for nom in noms):
+            return None
+        with conn:
+            conn.execute("UPDATE entrees SET acces_le = ? WHERE cle = ?", (time.time(), cle))
+    finally:
+        conn.close()
+
+    return {nom: fichiers[nom] for nom in noms}
+
+def toucher(chemin):
+    """Marque comme récemment utilisée l'entrée contenant le fichier `chemin`."""
+    conn = connexion()
+    try:
+        with conn:
+            conn.execute(
+                "UPDATE entrees SET acces_le = ? WHERE cle IN (SELECT cle FROM fichiers WHERE chemin = ?)",
+                (time.time(), chemin)
+            )
+    finally:
+        conn.close()
+
+def prendre_bail(cle, porteur, duree=None):
+    """
+    Protège l'entrée `cle` de l'éviction tant que `porteur` (ex. un job) l'utilise.
+    L'entrée n'a pas besoin d'exister encore : ses fichiers pourront être rangés ensuite.
+    """
+    duree = DUREE_BAIL_SECONDES if duree is None else duree
+    conn = connexion()
+    try:
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO baux (cle, porteur, expire_le) VALUES (?, ?, ?)",
+                (cle, porteur, time.time() + duree)
+            )
+    finally:
+        conn.close()
+
+def rendre_bail(cle, porteur):
+    """Libère le bail de `porteur` sur l'entrée `cle`."""
+    conn = connexion()
+    try:
+        with conn:
+            conn.execute("DELETE FROM baux WHERE cle = ? AND porteur = ?", (cle, porteur))
+    finally:
+        conn.close()
+
+def supprimer_entree(conn, cle):
+    """Supprime une entrée du stock (fichiers et index)."""
+    shutil.rmtree(dossier_entree(cle), ignore_errors=True)
+    try:
+        os.rmdir(os.path.dirname(dossier_entree(cle)))
+    except OSError:
+        pass  # Dossier de préfixe encore utilisé par d'autres entrées
+    with conn:
+        conn.execute("DELETE FROM fichiers WHERE cle = ?", (cle,))
+        conn.execute("DELETE FROM entrees WHERE cle = ?", (cle,))
+
+def purger(quota=None, duree_vie=None, cle_protegee=None):
+    """
+    Supprime les entrées non consultées depuis `duree_vie` secondes, puis les moins
+    récemment utilisées jusqu'à repasser sous `quota` octets. Les entrées sous bail
+    (traitement en cours) ne sont jamais supprimées. Retourne les clés supprimées.
+    """
+    quota = QUOTA_OCTETS if quota is None else quota
+    duree_vie = DUREE_VIE_SECONDES if duree_vie is None else duree_vie
+
+    supprimees = []
+    conn = connexion()
+    try:
+        maintenant = time.time()
+        with conn:
+            conn.execute("DELETE FROM baux WHERE expire_le < ?", (maintenant,))
+        sous_bail = {ligne['cle'] for ligne in conn.execute("SELECT DISTINCT cle FROM baux").fetchall()}
+
+        entrees = conn.execute(
+            "SELECT e.cle, e.acces_le, COALESCE(SUM(f.taille), 0) AS taille "
+            "FROM entrees e LEFT JOIN fichiers f ON f.cle = e.cle "
+            "GROUP BY e.cle ORDER BY e.acces_le ASC"
+        ).fetchall()
+
+        total = sum(entree['taille'] for entree in entrees)
+        limite_acces = maintenant - duree_vie
+
+        for entree in entrees:
+            if entree['cle'] == cle_protegee or entree['cle'] in sous_bail:
+                continue
+            if entree['acces_le'] >= limite_acces and total <= quota:
+                continue
+            supprimer_entree(conn, entree['cle'])
+            total -= entree['taille']
+            supprimees.append(entree['cle'])
+    finally:
+        conn.close()
+
+    if supprimees:
+        print(f"Stock d'artefacts : {len(supprimees)} entrée(s) supprimée(s)")
+    return supprimees
@@ -0,0 +1,236 @@
+import argparse
+import json
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from chaine_traitement import executer_chaine
+from outils_gl import cle_contenu
+
+# === PARAMÈTRES ===
+INTERVALLE_SCRUTATION = 5   # secondes entre deux parcours du dossier surveillé
+DELAI_STABILITE = 10        # secondes sans changement de taille/date avant traitement
+NOMBRE_WORKERS = max(1, (os.cpu_count() or 2) // 2)
+FICHIER_JOURNAL = "journal.jsonl"
+TENTATIVES_MAX = 3          # traitements interrompus (worker tué) relancés au plus, par exécution du démon
+
+# Statuts du journal : 'termine' et 'erreur' (échec de la chaîne) sont définitifs ;
+# 'en_cours' (démon arrêté) et 'interrompu' (worker arrêté brutalement) sont repris
+STATUTS_DEFINITIFS = ('termine', 'erreur')
+
+# === FONCTIONS ===
+
+def traiter_fichier(fichier_input, dossier_sortie, profilage=False, entite=None):
+    """
+    Exécute la chaîne complète (voir chaine_traitement.executer_chaine) pour un fichier.
+    Avec `profilage`, les fichiers de profil sont écrits dans le dossier de sortie ;
+    avec `entite`, le grand livre consolidé est ajouté à l'archive de l'entité.
+    """
+    return list(executer_chaine(fichier_input, dossier_sortie, entite=entite, profilage=profilage).values())
+
+def lire_journal(fichier_journal):
+    """Relit le journal et retourne le dernier statut connu par clé de fichier."""
+    etats = {}
+    if not os.path.exists(fichier_journal):
+        return etats
+    with open(fichier_journal, encoding='utf-8') as f:
+        for ligne in f:
+            try:
+                entree = json.loads(ligne)
+            except json.JSONDecodeError:
+                continue  # Ligne tronquée par un arrêt brutal
+            etats[entree['cle']] = entree
+    return etats
+
+def ecrire_journal(fichier_journal, **entree):
+    """Ajoute une entrée horodatée au journal (une ligne JSON, écrite sur disque immédiatement)."""
+    entree['horodatage'] = datetime.now().isoformat(timespec='seconds')
+    with open(fichier_journal, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entree, ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+class SurveillanceDossier:
+    """
+    Surveille un dossier par scrutation et confie chaque nouveau classeur .xlsx,
+    une fois stable, à un pool de processus borné.
+    """
+
+    def __init__(self, dossier_entree, dossier_sortie, nombre_workers=NOMBRE_WORKERS,
+                 intervalle=INTERVALLE_SCRUTATION, delai_stabilite=DELAI_STABILITE, profilage=False,
+                 entite=None):
+        self.dossier_entree = dossier_entree
+        self.dossier_sortie = dossier_sortie
+        self.nombre_workers = nombre_workers
+        self.intervalle = intervalle
+        self.delai_stabilite = delai_stabilite
+        self.profilage = profilage
+        self.entite = entite
+        self.fichier_journal = os.path.join(dossier_sortie, FICHIER_JOURNAL)
+
+        os.makedirs(dossier_sortie, exist_ok=True)
+        self.etats = lire_journal(self.fichier_journal)
+        self.pool = None
+        self.tentatives = {}   # clé -> nombre de traitements interrompus pendant cette exécution
+        self.observes = {}     # chemin -> (taille, date de modification, vu stable depuis)
+        self.en_cours = {}     # future -> (chemin, clé)
+        self.connus = {}       # chemin -> (taille, date de modification) déjà pris en charge
+        self.arret = False
+
+    def fichiers_stables(self):
+        """Retourne les classeurs dont la taille et la date n'ont pas changé depuis `delai_stabilite`."""
+        maintenant = time.time()
+        presents = set()
+        stables = []
+
+        with os.scandir(self.dossier_entree) as entrees:
+            for entree in entrees:
+                if not entree.is_file() or not entree.name.lower().endswith('.xlsx') or entree.name.startswith(('~$', '.')):
+                    continue
+                stat = entree.stat()
+                signature = (stat.st_size, stat.st_mtime)
+                presents.add(entree.path)
+
+                if self.connus.get(entree.path) == signature:
+                    continue
+
+                precedent = self.observes.get(entree.path)
+                if precedent is None or precedent[:2] != signature:
+                    self.observes[entree.path] = (*signature, maintenant)
+                elif maintenant - precedent[2] >= self.delai_stabilite:
+                    stables.append((entree.path, signature))
+
+        # Oublier les fichiers retirés du dossier
+        for chemin in set(self.observes) - presents:
+            del self.observes[chemin]
+        for chemin in set(self.connus) - presents:
+            del self.connus[chemin]
+
+        return stables
+
+    def dossier_resultats(self, chemin, cle):
+        """Dossier de sortie propre à un fichier (nom du fichier + début de sa clé)."""
+        nom = os.path.splitext(os.path.basename(chemin))[0]
+        return os.path.join(self.dossier_sortie, f"{nom}_{cle[:12]}")
+
+    def reconstruire_pool(self):
+        """Remplace le pool, inutilisable après l'arrêt brutal d'un worker (ex. OOM)."""
+        print("Pool de traitement interrompu, redémarrage des workers...")
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.pool = ProcessPoolExecutor(max_workers=self.nombre_workers)
+
+    def soumettre(self, chemin, signature):
+        """Confie un fichier stable au pool, sauf s'il a déjà été traité (même contenu)."""
+        self.connus[chemin] = signature
+        self.observes.pop(chemin, None)
+
+        try:
+            cle = cle_contenu(chemin)
+        except OSError as e:
+            print(f"Impossible de lire {chemin} : {str(e)}")
+            del self.connus[chemin]
+            return
+
+        statut = self.etats.get(cle, {}).get('statut')
+        if statut in STATUTS_DEFINITIFS:
+            print(f"{chemin} déjà traité ({statut}), ignoré.")
+            return
+        if self.tentatives.get(cle, 0) >= TENTATIVES_MAX:
+            print(f"{chemin} interrompu {TENTATIVES_MAX} fois, repris au prochain démarrage.")
+            return
+
+        dossier = self.dossier_resultats(chemin, cle)
+        arguments = (traiter_fichier, chemin, dossier, self.profilage, self.entite)
+        try:
+            future = self.pool.submit(*arguments)
+        except BrokenProcessPool:
+            self.reconstruire_pool()
+            future = self.pool.submit(*arguments)
+
+        self.etats[cle] = {'cle': cle, 'fichier': chemin, 'statut': 'en_cours', 'sortie': dossier}
+        ecrire_journal(self.fichier_journal, **self.etats[cle])
+        self.en_cours[future] = (chemin, cle)
+        print(f"Traitement de {chemin} lancé -> {dossier}")
+
+    def collecter(self):
+        """
+        Enregistre dans le journal le résultat des traitements terminés. Un traitement
+        dont le worker s'est arrêté brutalement est noté 'interrompu' et sera relancé.
+        """
+        pool_interrompu = False
+        for future in [f for f in self.en_cours if f.done()]:
+            chemin, cle = self.en_cours.pop(future)
+            entree = dict(self.etats[cle])
+            try:
+                entree['fichiers'] = future.result()
+                entree['statut'] = 'termine'
+                print(f"Traitement de {chemin} terminé.")
+            except BrokenProcessPool as e:
+                pool_interrompu = True
+                self.tentatives[cle] = self.tentatives.get(cle, 0) + 1
+                entree['statut'] = 'interrompu'
+                entree['erreur'] = str(e) or "Worker arrêté brutalement"
+                entree['tentative'] = self.tentatives[cle]
+                # Oublié pour être soumis de nouveau au prochain parcours du dossier
+                self.connus.pop(chemin, None)
+                print(f"Traitement de {chemin} interrompu (tentative {self.tentatives[cle]}/{TENTATIVES_MAX}).")
+            except Exception as e:
+                entree['statut'] = 'erreur'
+                entree['erreur'] = str(e)
+                print(f"Erreur lors du traitement de {chemin} : {str(e)}")
+            self.etats[cle] = entree
+            ecrire_journal(self.fichier_journal, **entree)
+
+        if pool_interrompu and not self.arret:
+            self.reconstruire_pool()
+
+    def arreter(self, *_):
+        self.arret = True
+
+    def executer(self):
+        """Boucle principale : scrutation, soumission dans la limite du pool, collecte."""
+        signal.signal(signal.SIGTERM, self.arreter)
+        signal.signal(signal.SIGINT, self.arreter)
+        print(f"Surveillance de {self.dossier_entree} ({self.nombre_workers} worker(s))...")
+
+        self.pool = ProcessPoolExecutor(max_workers=self.nombre_workers)
+        try:
+            while not self.arret:
+                self.collecter()
+                for chemin, signature in self.fichiers_stables():
+                    # Pool borné : les fichiers en surplus seront repris au prochain parcours
+                    if len(self.en_cours) >= self.nombre_workers:
+                        break
+                    self.soumettre(chemin, signature)
+                time.sleep(self.intervalle)
+
+            print("Arrêt demandé, attente des traitements en cours...")
+            while self.en_cours:
+                self.collecter()
+                time.sleep(0.5)
+        finally:
+            self.pool.shutdown(wait=True)
+
+# === MAIN ===
+
+def main():
+    parser = argparse.ArgumentParser(description="Traite automatiquement les grands livres F22 déposés dans un dossier.")
+    parser.add_argument('dossier_entree', help="Dossier surveillé")
+    parser.add_argument('dossier_sortie', help="Dossier des résultats et du journal")
+    parser.add_argument('--workers', type=int, default=NOMBRE_WORKERS, help="Nombre de processus de traitement")
+    parser.add_argument('--intervalle', type=float, default=INTERVALLE_SCRUTATION, help="Secondes entre deux parcours")
+    parser.add_argument('--stabilite', type=float, default=DELAI_STABILITE, help="Secondes sans modification avant traitement")
+    parser.add_argument('--profilage', action='store_true', help="Profiler chaque traitement (pstats, collapsed, allocations)")
+    parser.add_argument('--entite', help="Entité à laquelle ajouter chaque grand livre dans l'archive pluriannuelle")
+    args = parser.parse_args()
+
+    SurveillanceDossier(
+        args.dossier_entree, args.dossier_sortie,
+        nombre_workers=args.workers, intervalle=args.intervalle, delai_stabilite=args.stabilite,
+        profilage=args.profilage, entite=args.entite
+    ).executer()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+import archive_gl
+
+def grand_livre():
+    """GL de deux feuilles : l'une sur l'exercice 2023, l'autre sur l'exercice 2024."""
+    n = 40
+    return pd.DataFrame({
+        'Date': pd.Timestamp('2023-06-01') + pd.to_timedelta(np.arange(n) * 9, 'D'),
+        'Libellé': [f"Écriture {i}" for i in range(n)],
+        'Compte': np.where(np.arange(n) % 2, '1020', '1100'),
+        'Nom du Compte': 'Compte',
+        'Montant': 1.0,
+        'Devise': 'CHF',
+        'Origine': 'F',
+        'Origine_écriture': 'Comptabilité financière (F11)',
+        'Document': np.arange(n).astype(float),
+        'Débit': 1.0,
+        'Crédit': 0.0,
+        'Feuille': np.where(np.arange(n) % 2, '_1020_Banque', '_1100_Debiteurs'),
+    })
+
+PERIODES = {'_1020_Banque': '01.01.2023 - 31.12.2023', '_1100_Debiteurs': '01.01.2024 - 31.12.2024'}
+
+def lignes_par_exercice(entite, dossier):
+    return {a: archive_gl.lire_archive(entite, [a], dossier=dossier).num_rows for a in archive_gl.annees_archivees(entite, dossier)}
+
+def test_rearchiver_une_source_dont_les_exercices_changent(tmp_path):
+    dossier = str(tmp_path)
+    gl = grand_livre()
+
+    archive_gl.archiver_gl(gl, 'E', 'S', PERIODES, dossier=dossier)
+    assert lignes_par_exercice('E', dossier) == {2023: 20, 2024: 20}
+
+    # Sans périodes, tout le GL est rattaché à un seul exercice : l'autre partition est supprimée
+    archive_gl.archiver_gl(gl, 'E', 'S', dossier=dossier)
+    assert lignes_par_exercice('E', dossier) == {2023: 40}
+
+    archive_gl.archiver_gl(gl, 'E', 'S', PERIODES, dossier=dossier)
+    assert lignes_par_exercice('E', dossier) == {2023: 20, 2024: 20}
+
+def test_les_autres_sources_sont_conservees(tmp_path):
+    dossier = str(tmp_path)
+    gl = grand_livre()
+
+    archive_gl.archiver_gl(gl, 'E', 'A', PERIODES, dossier=dossier)
+    archive_gl.archiver_gl(gl.iloc[:10], 'E', 'B', {f: '01.01.2024 - 31.12.2024' for f in PERIODES}, dossier=dossier)
+    archive_gl.archiver_gl(gl.iloc[:4], 'E', 'A', PERIODES, dossier=dossier)
+
+    assert lignes_par_exercice('E', dossier) == {2023: 2, 2024: 12}
@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+
+import comparaison_soldes
+
+def balance(soldes):
+    """Balance des soldes au format d'analyser_comptes : {compte: solde}."""
+    return pd.DataFrame({
+        'Compte': list(soldes),
+        'Nom du Compte': [f"Compte {c}" for c in soldes],
+        'Total Débit': [max(v, 0) for v in soldes.values()],
+        'Total Crédit': [max(-v, 0) for v in soldes.values()],
+        'Solde au 31.12': list(soldes.values()),
+    })
+
+def test_comptes_alignes_par_entite():
+    comptes, categories = comparaison_soldes.comparer_soldes({
+        ('ACME', '2023'): balance({'1020': 100.0, '3200': -50.0}),
+        ('ACME', '2024'): balance({'1020': 150.0}),
+        ('BETA', '2023'): balance({'1020': 1000.0}),
+        ('BETA', '2024'): balance({'1020': 900.0, '1100': 10.0}),
+    })
+    comptes = comptes.set_index(['Entité', 'Compte'])
+
+    # Le compte 1020 de chaque entité reste sur sa propre ligne
+    assert comptes.loc[('ACME', '1020'), ['2023', '2024']].tolist() == [100.0, 150.0]
+    assert comptes.loc[('BETA', '1020'), ['2023', '2024']].tolist() == [1000.0, 900.0]
+    assert comptes.loc[('BETA', '1020'), 'Écart 2024 / 2023'] == -100.0
+    assert comptes.loc[('ACME', '3200'), 'Statut'] == 'Disparu'
+    assert comptes.loc[('BETA', '1100'), 'Statut'] == 'Apparu'
+    assert set(categories['Entité']) == {'ACME', 'BETA'}
+
+def test_entite_sans_balance_pour_un_libelle():
+    comptes, _ = comparaison_soldes.comparer_soldes({
+        ('ACME', '2023'): balance({'1020': 100.0}),
+        ('ACME', '2024'): balance({'1020': 150.0}),
+        ('BETA', '2024'): balance({'1020': 900.0}),
+    })
+    beta = comptes.set_index(['Entité', 'Compte']).loc[('BETA', '1020')]
+    assert pd.isna(beta['2023']) and pd.isna(beta['Écart 2024 / 2023'])
+    assert beta['Statut'] == 'Présent'
+
+def test_source_introuvable(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        comparaison_soldes.comparer_soldes({'2023': 'job:inconnu', '2024': balance({'1020': 1.0})})
@@ -0,0 +1,56 @@
+import html
+import re
+import openpyxl
+import pytest
+
+import app as application
+
+COMPTES = ["_1020_Banque_UBS", "_1100_Debiteurs", "_3200_Ventes", "_6500_Frais_admin"]
+
+def creer_grand_livre(chemin):
+    """Grand livre F22 minimal : une feuille par compte, période 'Solde' en ligne 4."""
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for n, nom in enumerate(COMPTES):
+        ws = wb.create_sheet(nom)
+        ws.append(["Date doc", "Texte", "A", "Document", "Contre", "Débit", "Crédit", "x", "Solde"])
+        ws.append([None] * 9)
+        ws.append([None] * 9)
+        ws.append(["Solde 01.01.2023 - 31.12.2023", None, None, None, None, None, None, None, 0])
+        for i in range(1, 13):
+            ws.append([f"15.{i:02d}.2023", f"Écriture {i}", "F", 100 * n + i, None,
+                       round(10.5 * i, 2) if n % 2 else 0, 0 if n % 2 else round(7.25 * i, 2), None, None])
+    wb.save(chemin)
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return application.app.test_client()
+
+def test_clic_categorie_et_compte_retourne_les_ecritures(client, tmp_path):
+    fichier = tmp_path / "gl.xlsx"
+    creer_grand_livre(fichier)
+    job_id = application.creer_job("gl.xlsx")
+    application.background_processing(job_id, str(fichier))
+
+    page = client.get(f"/results?job_id={job_id}").get_data(as_text=True)
+    categories = [html.unescape(c) for c in re.findall(r'class="[^"]*drilldown-row[^"]*" data-categorie="([^"]*)"', page)]
+    comptes = re.findall(r'class="[^"]*drilldown-row[^"]*" data-compte="([^"]*)"', page)
+
+    assert categories and comptes
+    assert "Résultat de l'exercice" not in categories
+    assert sorted(comptes) == ["1020", "1100", "3200", "6500"]
+
+    for filtre in [{"categorie": c} for c in categories] + [{"compte": c} for c in comptes]:
+        reponse = client.get("/drilldown", query_string={"job_id": job_id, **filtre})
+        assert reponse.status_code == 200, filtre
+        assert reponse.get_json()["total"] > 0, filtre
+
+def test_compte_inconnu_introuvable(client, tmp_path):
+    fichier = tmp_path / "gl.xlsx"
+    creer_grand_livre(fichier)
+    job_id = application.creer_job("gl.xlsx")
+    application.background_processing(job_id, str(fichier))
+
+    assert client.get("/drilldown", query_string={"job_id": job_id, "compte": "1020.0"}).status_code == 404
+    assert client.get("/drilldown", query_string={"job_id": job_id, "compte": "9999"}).status_code == 404